@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8; py-indent-offset: 4 -*-
+#
+##  MIT License
+##
+##  Copyright (c) 2024 Bash Club
+##
+##  Permission is hereby granted, free of charge, to any person obtaining a copy
+##  of this software and associated documentation files (the "Software"), to deal
+##  in the Software without restriction, including without limitation the rights
+##  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+##  copies of the Software, and to permit persons to whom the Software is
+##  furnished to do so, subject to the following conditions:
+##
+##  The above copyright notice and this permission notice shall be included in all
+##  copies or substantial portions of the Software.
+##
+##  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+##  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+##  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+##  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+##  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+##  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+##  SOFTWARE.
+
+## Offline benchmark of the object model of the special agent. The devices of one
+## generated site (mock_unifi_controller.py) are built into unifi_device objects with
+## their ports, radios and ssids, without network and controller. Reports the
+## construction time and the memory the object tree keeps after the decoded records
+## are released, plus the peak while decoding and building (tracemalloc).
+##
+##  ./bench_unifi_agent_model.py
+##  ./bench_unifi_agent_model.py --devices 5000 --agent old_agent --agent ../share/check_mk/agents/special/agent_unifi_controller
+
+import argparse
+import gc
+import importlib.machinery
+import importlib.util
+import json
+import os
+import sys
+import time
+import tracemalloc
+import types
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_AGENT = os.path.join(BENCHMARK_DIR,"..","share","check_mk","agents","special","agent_unifi_controller")
+sys.path.insert(0,BENCHMARK_DIR)
+from mock_unifi_controller import unifi_estate
+
+def load_agent(path,name):
+    ## the agent has no .py suffix
+    _loader = importlib.machinery.SourceFileLoader(name,path)
+    _spec = importlib.util.spec_from_loader(name,_loader)
+    _module = importlib.util.module_from_spec(_spec)
+    _loader.exec_module(_module)
+    return _module
+
+class bench_site(object):
+    ## just what unifi_device and its ports, radios and ssids ask their parents for
+    def __init__(self,compact):
+        self.name = "default"
+        self._SITE_DEVICES = []
+        self._PORTCONFIGS = {"000000000000000000000001" : "All", "000000000000000000000002" : "Disabled"}
+        self._UNIFI_SSIDS = []
+        self._UNIFI_DEVICES = []
+        self._UNIFICONTROLLER = self
+        self._API = types.SimpleNamespace(COMPACT=compact,PIGGYBACK_ATTRIBUT="name",STREAM=False,CLIENTS=False,ROGUEAP=0)
+
+def decode(agent,body):
+    ## the records as the agent gets them from its decoder, reduced where the version does that
+    _reduce = getattr(agent,"_reduce_device",None)
+    return [_reduce(_device) if _reduce else _device for _device in json.loads(body)]
+
+def build(agent,devices,compact):
+    ## the decoded list is released while the objects are built, like in the agent
+    _site = bench_site(compact)
+    while devices:
+        _device = devices.pop()
+        _site._UNIFI_DEVICES.append(agent.unifi_device(_PARENT=_site,**_device))
+    return _site
+
+def measure(agent,body,repeat,compact):
+    _times = []
+    for _run in range(repeat):
+        _devices = decode(agent,body)
+        gc.collect()
+        _start = time.perf_counter()
+        _site = build(agent,_devices,compact)
+        _times.append(time.perf_counter() - _start)
+        del _site
+    gc.collect()
+    tracemalloc.start()
+    _site = build(agent,decode(agent,body),compact)
+    gc.collect()
+    _retained,_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    _objects = len(_site._UNIFI_DEVICES) + sum(len(getattr(_device,"_NETWORK_PORTS",[])) + len(getattr(_device,"_NETWORK_RADIO",[])) + len(getattr(_device,"_NETWORK_SSIDS",[]))
+                                              for _device in _site._UNIFI_DEVICES)
+    return min(_times),_retained / 2**20,_peak / 2**20,_objects
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Construction time and memory of the unifi agent object model")
+    parser.add_argument("--agent",dest="agents",action="append",help="agent file, repeat to compare versions (default: the agent of this repository)")
+    parser.add_argument("--devices",type=int,default=5000,help="devices of the generated site")
+    parser.add_argument("--ssids",type=int,default=4,help="ssids per access point")
+    parser.add_argument("--compact",action="store_true",help="objects for the --compact output")
+    parser.add_argument("--repeat",type=int,default=3)
+    parser.add_argument("--seed",type=int,default=0)
+    args = parser.parse_args()
+
+    _body = json.dumps(unifi_estate(1,args.devices,args.ssids,seed=args.seed).devices("default"))
+    print(f"{'agent':<40}{'objects':>9}{'build s':>10}{'kept MB':>10}{'peak MB':>10}")
+    for _number,_path in enumerate(args.agents or [DEFAULT_AGENT]):
+        _agent = load_agent(_path,f"unifi_agent_{_number}")
+        _seconds,_retained,_peak,_objects = measure(_agent,_body,args.repeat,args.compact)
+        print(f"{os.path.basename(_path)[-40:]:<40}{_objects:>9}{_seconds:>10.3f}{_retained:>10.1f}{_peak:>10.1f}")
@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8; py-indent-offset: 4 -*-
+#
+##  MIT License
+##
+##  Copyright (c) 2024 Bash Club
+##
+##  Permission is hereby granted, free of charge, to any person obtaining a copy
+##  of this software and associated documentation files (the "Software"), to deal
+##  in the Software without restriction, including without limitation the rights
+##  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+##  copies of the Software, and to permit persons to whom the Software is
+##  furnished to do so, subject to the following conditions:
+##
+##  The above copyright notice and this permission notice shall be included in all
+##  copies or substantial portions of the Software.
+##
+##  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+##  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+##  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+##  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+##  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+##  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+##  SOFTWARE.
+
+## Offline benchmark of the parse, discovery, check and inventory functions of the
+## unifi check plugins. The split phase is the work of checkmk before the parse
+## function: the key|value lines are split at the separator, the --compact json
+## lines are passed as they are. The Checkmk API is replaced by minimal stand-ins, the
+## interfaces util only iterates the section, so the numbers are the plugin's own work.
+##
+##  ./bench_unifi_plugins.py
+##  ./bench_unifi_plugins.py --plugin old/unifi_controller.py --plugin ../lib/check_mk/base/plugins/agent_based/unifi_controller.py
+##  ./bench_unifi_plugins.py --compact --repeat 20 --json bench_output.json
+
+import argparse
+import enum
+import gc
+import importlib.util
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import types
+from dataclasses import dataclass
+from typing import Optional
+
+PLUGIN_PACKAGE = "cmk.base.plugins.agent_based"
+DEFAULT_PLUGIN = os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","lib","check_mk","base","plugins","agent_based","unifi_controller.py")
+
+########################################
+######
+######      S T U B S
+######
+########################################
+class _state(enum.IntEnum):
+    OK = 0
+    WARN = 1
+    CRIT = 2
+    UNKNOWN = 3
+
+    @classmethod
+    def worst(cls,*states):
+        return max(states)
+
+class _result(object):
+    __slots__ = ("state","summary","notice","details")
+    def __init__(self,*,state,summary=None,notice=None,details=None):
+        self.state = state
+        self.summary = summary
+        self.notice = notice
+        self.details = details
+
+class _metric(object):
+    __slots__ = ("name","value","levels","boundaries")
+    def __init__(self,name,value,*,levels=None,boundaries=None):
+        self.name = name
+        self.value = value
+        self.levels = levels
+        self.boundaries = boundaries
+
+class _service(object):
+    __slots__ = ("item","parameters","labels")
+    def __init__(self,*,item=None,parameters=None,labels=None):
+        self.item = item
+        self.parameters = parameters
+        self.labels = labels
+
+class _ignore_results(object):
+    def __init__(self,value=""):
+        self.value = value
+
+class _table_row(object):
+    def __init__(self,*,path,key_columns,inventory_columns=None,status_columns=None):
+        self.path = path
+        self.key_columns = key_columns
+        self.inventory_columns = inventory_columns
+        self.status_columns = status_columns
+
+class _attributes(object):
+    def __init__(self,*,path,inventory_attributes=None,status_attributes=None):
+        self.path = path
+        self.inventory_attributes = inventory_attributes
+        self.status_attributes = status_attributes
+
+class _render(object):
+    datetime = staticmethod(lambda value: time.strftime("%Y-%m-%d %H:%M:%S",time.localtime(value)))
+    timespan = staticmethod(lambda value: f"{value:.0f} s")
+    bytes = staticmethod(lambda value: f"{value} B")
+    disksize = staticmethod(lambda value: f"{value} B")
+    filesize = staticmethod(lambda value: f"{value} B")
+    networkbandwidth = staticmethod(lambda value: f"{value} B/s")
+    nicspeed = staticmethod(lambda value: f"{value} B/s")
+    iobandwidth = staticmethod(lambda value: f"{value} B/s")
+    percent = staticmethod(lambda value: f"{value:.2f}%")
+    frequency = staticmethod(lambda value: f"{value} Hz")
+
+class _register(object):
+    class RuleSetType(enum.Enum):
+        ALL = "all"
+        MERGED = "merged"
+
+    def __init__(self):
+        self.sections = {}
+        self.check_plugins = {}
+        self.inventory_plugins = {}
+
+    def agent_section(self,*,name,parse_function=None,**kwargs):
+        self.sections[name] = dict(kwargs,name=name,parse_function=parse_function or (lambda string_table: string_table))
+
+    def check_plugin(self,*,name,**kwargs):
+        self.check_plugins[name] = dict(kwargs,name=name)
+
+    def inventory_plugin(self,*,name,**kwargs):
+        self.inventory_plugins[name] = dict(kwargs,name=name)
+
+def _check_levels(value,*,levels_upper=None,levels_lower=None,metric_name=None,render_func=None,label=None,boundaries=None,notice_only=False):
+    _state_value = _state.OK
+    if levels_upper and value >= levels_upper[0]:
+        _state_value = _state.CRIT if value >= levels_upper[1] else _state.WARN
+    elif levels_lower and value < levels_lower[0]:
+        _state_value = _state.CRIT if value < levels_lower[1] else _state.WARN
+    _text = (render_func or str)(value)
+    if label:
+        _text = f"{label}: {_text}"
+    if notice_only:
+        yield _result(state=_state_value,notice=_text)
+    else:
+        yield _result(state=_state_value,summary=_text)
+    if metric_name:
+        yield _metric(metric_name,value,levels=levels_upper,boundaries=boundaries)
+
+class _get_rate_error(Exception):
+    pass
+
+def _get_rate(value_store,key,timestamp,value,*,raise_overflow=False):
+    _last = value_store.get(key)
+    value_store[key] = (timestamp,value)
+    if _last is None or timestamp <= _last[0]:
+        return 0.0
+    return (value - _last[1]) / (timestamp - _last[0])
+
+def _interfaces_module():
+    _module = types.ModuleType(f"{PLUGIN_PACKAGE}.utils.interfaces")
+
+    @dataclass
+    class Attributes:
+        index           : str
+        descr           : str
+        alias           : str
+        type            : str
+        speed           : int = 0
+        oper_status     : str = ""
+        out_qlen        : Optional[int] = None
+        phys_address    : str = ""
+        oper_status_name: str = ""
+        speed_as_text   : str = ""
+        group           : Optional[str] = None
+        node            : Optional[str] = None
+        admin_status    : Optional[str] = None
+
+    @dataclass
+    class Counters:
+        in_octets   : int = 0
+        in_ucast    : int = 0
+        in_mcast    : int = 0
+        in_bcast    : int = 0
+        in_nucast   : int = 0
+        in_disc     : int = 0
+        in_err      : int = 0
+        out_octets  : int = 0
+        out_ucast   : int = 0
+        out_mcast   : int = 0
+        out_bcast   : int = 0
+        out_nucast  : int = 0
+        out_disc    : int = 0
+        out_err     : int = 0
+
+    @dataclass
+    class InterfaceWithCounters:
+        attributes  : Attributes
+        counters    : Counters
+
+    def discover_interfaces(params,section):
+        for _iface in section:
+            yield _service(item=_iface.attributes.index)
+
+    def check_multiple_interfaces(item,params,section,**kwargs):
+        ## only finds the interface, the real util computes rates and levels on top
+        for _iface in section:
+            if item in (_iface.attributes.index,_iface.attributes.alias,_iface.attributes.descr):
+                yield _result(state=_state.OK,summary=f"[{_iface.attributes.alias}]")
+                return
+
+    _module.Attributes = Attributes
+    _module.Counters = Counters
+    _module.InterfaceWithCounters = InterfaceWithCounters
+    _module.Section = list
+    _module.DISCOVERY_DEFAULT_PARAMETERS = {"discovery_single" : (True,{"item_appearance" : "index"}),"matching_conditions" : (True,{})}
+    _module.CHECK_DEFAULT_PARAMETERS = {"errors" : {"both" : ("abs",(10,20))}}
+    _module.discover_interfaces = discover_interfaces
+    _module.check_multiple_interfaces = check_multiple_interfaces
+    return _module
+
+def install_stubs():
+    ## fresh stand-ins for the imports of the plugin, returns the register to read the plugins from
+    _register_obj = _register()
+    _modules = {}
+    for _name in ("cmk","cmk.gui","cmk.base","cmk.base.plugins",PLUGIN_PACKAGE,f"{PLUGIN_PACKAGE}.agent_based_api",f"{PLUGIN_PACKAGE}.utils"):
+        _modules[_name] = types.ModuleType(_name)
+        _modules[_name].__path__ = []
+    _i18n = _modules["cmk.gui.i18n"] = types.ModuleType("cmk.gui.i18n")
+    _i18n._ = lambda text: text
+
+    _v1 = _modules[f"{PLUGIN_PACKAGE}.agent_based_api.v1"] = types.ModuleType(f"{PLUGIN_PACKAGE}.agent_based_api.v1")
+    _v1.__path__ = []
+    _value_store = {}
+    for _name,_obj in (("State",_state),("Result",_result),("Metric",_metric),("Service",_service),("IgnoreResults",_ignore_results),
+            ("TableRow",_table_row),("Attributes",_attributes),("render",_render),("register",_register_obj),
+            ("check_levels",_check_levels),("get_rate",_get_rate),("GetRateError",_get_rate_error),
+            ("get_value_store",lambda: _value_store)):
+        setattr(_v1,_name,_obj)
+
+    _type_defs = _modules[f"{PLUGIN_PACKAGE}.agent_based_api.v1.type_defs"] = types.ModuleType(f"{PLUGIN_PACKAGE}.agent_based_api.v1.type_defs")
+    for _name in ("CheckResult","DiscoveryResult","InventoryResult","StringTable","HostLabelGenerator"):
+        setattr(_type_defs,_name,object)
+    _v1.type_defs = _type_defs
+
+    _modules[f"{PLUGIN_PACKAGE}.utils.interfaces"] = _interfaces_module()
+    _modules[f"{PLUGIN_PACKAGE}.utils"].interfaces = _modules[f"{PLUGIN_PACKAGE}.utils.interfaces"]
+    for _name in list(sys.modules):
+        if _name == "cmk" or _name.startswith("cmk."):
+            del sys.modules[_name]
+    sys.modules.update(_modules)
+    return _register_obj
+
+def load_plugin(filename):
+    _register_obj = install_stubs()
+    _spec = importlib.util.spec_from_file_location(f"{PLUGIN_PACKAGE}.unifi_controller",filename)
+    _module = importlib.util.module_from_spec(_spec)
+    sys.modules[_spec.name] = _module
+    _spec.loader.exec_module(_module)
+    return _register_obj
+
+########################################
+######
+######      G E N E R A T O R S
+######
+########################################
+class section_generator(object):
+    ## realistic string_tables like the special agent writes them, --compact gives the sep(0) json format
+    def __init__(self,seed=0,compact=False):
+        self._random = random.Random(seed)
+        self.compact = compact
+
+    def _mac(self):
+        return ":".join(f"{self._random.randint(0,255):02x}" for _ in range(6))
+
+    def _flat(self,record):
+        if self.compact:
+            return [[json.dumps(record,separators=(",",":"))]]
+        return [[_k,str(_v)] for _k,_v in record.items()]
+
+    def _nested(self,records):
+        _table = []
+        for _key,_record in records:
+            if self.compact:
+                _table.append([json.dumps({str(_key) : _record},separators=(",",":"))])
+            else:
+                _table.extend([str(_key),_k,str(_v)] for _k,_v in _record.items())
+        return _table
+
+    def device(self,name,devicetype,model):
+        _rnd = self._random
+        _record = {
+            "mac" : self._mac(), "model" : model, "type" : devicetype, "adopted" : 1, "state" : _rnd.choice([1,1,1,1,0,2]),
+            "ip" : f"10.{_rnd.randint(0,255)}.{_rnd.randint(0,255)}.{_rnd.randint(1,254)}", "version" : "6.6.55.15189",
+            "serial" : f"{_rnd.getrandbits(48):012X}", "num_sta" : _rnd.randint(0,80), "user_num_sta" : _rnd.randint(0,60),
+            "guest_num_sta" : _rnd.randint(0,20), "satisfaction" : _rnd.randint(-1,100), "upgradeable" : _rnd.randint(0,1),
+            "name" : name, "board_rev" : _rnd.randint(1,30), "loadavg_1" : f"{_rnd.random():.2f}",
+            "loadavg_5" : f"{_rnd.random():.2f}", "loadavg_15" : f"{_rnd.random():.2f}", "mem_buffer" : 0,
+            "mem_total" : 1028292608, "mem_used" : _rnd.randint(10**8,10**9), "cpu" : f"{_rnd.random()*100:.1f}",
+            "mem" : f"{_rnd.random()*100:.1f}", "model_name" : model, "general_temperature" : f"{_rnd.uniform(30,70):.1f}",
+            "uplink_up" : 1, "uplink_device" : f"sw-core-{_rnd.randint(1,4)}", "uplink_remote_port" : _rnd.randint(1,52),
+            "uplink_type" : "wire", "snmp_contact" : "noc@example.com", "snmp_location" : "rack 1"
+        }
+        if devicetype == "usw":
+            _record["fan_level"] = _rnd.randint(0,100)
+        if devicetype == "ugw":
+            _record.update({"speedtest_status" : 2, "speedtest_time" : 1700000000, "speedtest_ping" : 12.3,
+                "speedtest_download" : 912.4, "speedtest_upload" : 95.1})
+        return self._flat(_record)
+
+    def ports(self,count):
+        _rnd = self._random
+        _records = []
+        for _idx in range(1,count+1):
+            _up = _rnd.random() > 0.3
+            _records.append((_idx,{
+                "port_idx" : _idx, "port_poe" : 1, "poe_caps" : 7, "op_mode" : "switch", "poe_mode" : "auto",
+                "anomalies" : 0, "autoneg" : 1, "dot1x_mode" : "unknown", "dot1x_status" : "disabled", "enable" : 1,
+                "full_duplex" : 1, "is_uplink" : int(_idx == count), "jumbo" : 1, "poe_class" : "Class 4",
+                "poe_current" : f"{_rnd.uniform(0,200):.2f}", "poe_enable" : int(_up), "poe_good" : int(_up),
+                "poe_power" : f"{_rnd.uniform(0,15):.2f}", "poe_voltage" : f"{_rnd.uniform(48,54):.2f}",
+                "rx_broadcast" : _rnd.randint(0,10**6), "rx_bytes" : _rnd.randint(0,10**12), "rx_dropped" : _rnd.randint(0,100),
+                "rx_errors" : _rnd.randint(0,10), "rx_multicast" : _rnd.randint(0,10**6), "rx_packets" : _rnd.randint(0,10**9),
+                "satisfaction" : _rnd.randint(50,100), "satisfaction_reason" : 0, "speed" : _rnd.choice([100,1000,2500,10000]),
+                "stp_pathcost" : 20000, "stp_state" : "forwarding", "tx_broadcast" : _rnd.randint(0,10**6),
+                "tx_bytes" : _rnd.randint(0,10**12), "tx_dropped" : _rnd.randint(0,100), "tx_errors" : _rnd.randint(0,10),
+                "tx_multicast" : _rnd.randint(0,10**6), "tx_packets" : _rnd.randint(0,10**9), "tx_bytes_r" : _rnd.randint(0,10**6),
+                "rx_bytes_r" : _rnd.randint(0,10**6), "bytes_r" : _rnd.randint(0,10**6), "name" : f"Port {_idx}",
+                "aggregated_by" : 0, "oper_status" : 1 if _up else 2, "admin_status" : 1, "portconf" : "All"
+            }))
+        return self._nested(_records)
+
+    def radios(self,count):
+        _rnd = self._random
+        _records = []
+        for _radio,_channel in (("ng",6),("na",36),("6e",37))[:count]:
+            _records.append((_radio,{
+                "radio" : _radio, "channel" : _channel, "ht" : 40, "tx_power_mode" : "auto", "min_rssi_enabled" : 0,
+                "satisfaction" : _rnd.randint(50,100), "num_sta" : _rnd.randint(0,50), "user_num_sta" : _rnd.randint(0,40),
+                "guest_num_sta" : _rnd.randint(0,10), "iot_num_sta" : _rnd.randint(0,5), "tx_packets" : _rnd.randint(0,10**8),
+                "tx_retries" : _rnd.randint(0,10**6), "cu_total" : _rnd.randint(0,100), "rx_bytes" : _rnd.randint(0,10**11),
+                "tx_bytes" : _rnd.randint(0,10**11), "tx_dropped" : _rnd.randint(0,1000)
+            }))
+        return self._nested(_records)
+
+    def ssids(self,count,radios):
+        _rnd = self._random
+        _records = []
+        for _idx in range(count):
+            for _radio in ("ng","na","6e")[:radios]:
+                _records.append((f"wlan-{_idx:02d}",{f"{_radio}_{_k}" : _v for _k,_v in {
+                    "num_sta" : _rnd.randint(0,30), "channel" : {"ng" : 6, "na" : 36, "6e" : 37}[_radio],
+                    "tcp_packet_loss" : _rnd.randint(0,20), "wifi_retries" : _rnd.randint(0,50), "wifi_latency" : _rnd.randint(0,80),
+                    "avg_client_signal" : _rnd.randint(-85,-40), "satisfaction" : _rnd.randint(-1,100), "is_guest" : int(_idx % 4 == 3),
+                    "rx_bytes" : _rnd.randint(0,10**10), "tx_bytes" : _rnd.randint(0,10**10), "bssid" : self._mac(),
+                    "usage" : "user", "ccq" : _rnd.randint(0,1000), "tx_power" : 20
+                }.items()}))
+        return self._nested(_records)
+
+    def switch(self,ports):
+        return {
+            "unifi_device"          : self.device(f"sw-{ports}-{self._random.getrandbits(16)}","usw","US48PRO"),
+            "unifi_network_ports"   : self.ports(ports),
+        }
+
+    def access_point(self,radios,ssids):
+        return {
+            "unifi_device"          : self.device(f"ap-{self._random.getrandbits(16)}","uap","U6PRO"),
+            "unifi_network_radios"  : self.radios(radios),
+            "unifi_network_ssids"   : self.ssids(ssids,radios),
+        }
+
+    def controller(self,sites,devices_per_site,ssids):
+        _rnd = self._random
+        _sites = []
+        _shortlist = []
+        _topology = []
+        _ssidlist = []
+        for _site in range(sites):
+            _desc = f"Site {_site:04d}"
+            _sites.append((f"site{_site:04d}",{
+                "desc" : _desc, "num_new_alarms" : _rnd.randint(0,3), "satisfaction" : _rnd.randint(50,100),
+                "lan_status" : "ok", "lan_num_user" : _rnd.randint(0,100), "lan_num_guest" : _rnd.randint(0,20),
+                "lan_rx_bytes_r" : _rnd.randint(0,10**6), "lan_tx_bytes_r" : _rnd.randint(0,10**6), "lan_num_sw" : _rnd.randint(1,8),
+                "lan_num_adopted" : 8, "wlan_status" : "ok", "wlan_num_user" : _rnd.randint(0,100), "wlan_num_guest" : _rnd.randint(0,20),
+                "wlan_num_iot" : _rnd.randint(0,5), "wlan_rx_bytes_r" : _rnd.randint(0,10**6), "wlan_tx_bytes_r" : _rnd.randint(0,10**6),
+                "wlan_num_ap" : _rnd.randint(1,12), "wlan_num_adopted" : 12, "wan_status" : "ok", "www_status" : "ok", "vpn_status" : "unknown"
+            }))
+            for _idx in range(devices_per_site):
+                _name = f"dev-{_site:04d}-{_idx:03d}"
+                _shortlist.append((_name,{
+                    "mac" : self._mac(), "model" : "U6PRO", "adopted" : 1, "state" : _rnd.choice([1,1,1,0]), "ip" : "10.0.0.1",
+                    "version" : "6.6.55", "serial" : f"{_rnd.getrandbits(48):012X}", "uptime" : _rnd.randint(0,10**7),
+                    "num_sta" : _rnd.randint(0,50), "upgradeable" : 0, "model_name" : "U6-Pro"
+                }))
+                _topology.append((_name,{
+                    "mac" : self._mac(), "state" : _rnd.choice([1,1,1,0]), "uplink_device" : "" if _idx == 0 else f"dev-{_site:04d}-000",
+                    "depth" : int(_idx > 0), "downstream" : devices_per_site - 1 if _idx == 0 else 0,
+                    "path" : "" if _idx == 0 else f"dev-{_site:04d}-000"
+                }))
+            for _ssid in range(ssids):
+                _ssidlist.append((f"wlan-{_ssid:02d}@{_desc}",{
+                    "num_sta" : _rnd.randint(0,100), "ng_num_sta" : _rnd.randint(0,50), "na_num_sta" : _rnd.randint(0,50),
+                    "ng_tcp_packet_loss" : _rnd.randint(0,20), "na_tcp_packet_loss" : _rnd.randint(0,20),
+                    "ng_wifi_retries" : _rnd.randint(0,50), "na_wifi_retries" : _rnd.randint(0,50),
+                    "ng_wifi_latency" : _rnd.randint(0,80), "na_wifi_latency" : _rnd.randint(0,80),
+                    "ng_avg_client_signal" : _rnd.randint(-85,-40), "na_avg_client_signal" : _rnd.randint(-85,-40),
+                    "channels" : "6,36", "avg_client_signal" : _rnd.randint(-85,-40)
+                }))
+        return {
+            "unifi_controller"          : self._flat({"name" : "unifi", "hostname" : "unifi", "timezone" : "Europe/Berlin", "update_available" : 0,
+                                                      "uptime" : 1234567, "autobackup" : 1, "type" : "unifi-sw-controller", "controller_version" : "8.0.26"}),
+            "unifi_sites"               : self._nested(_sites),
+            "unifi_device_shortlist"    : self._nested(_shortlist),
+            "unifi_ssid_list"           : self._nested(_ssidlist),
+            "unifi_topology"            : self._nested(_topology),
+        }
+
+########################################
+######
+######      R U N N E R
+######
+########################################
+PHASES = ("split","parse","discovery","check","inventory")
+
+def _plugin_args(plugin,section,item=None,discovery=False):
+    _kwargs = {"section" : section}
+    if discovery:
+        if plugin.get("discovery_ruleset_name"):
+            _kwargs["params"] = [plugin.get("discovery_default_parameters",{})] if plugin.get("discovery_ruleset_type") is not None else plugin.get("discovery_default_parameters",{})
+        return _kwargs
+    if item is not None:
+        _kwargs["item"] = item
+    if "check_default_parameters" in plugin:
+        _kwargs["params"] = plugin.get("check_default_parameters") or {}
+    return _kwargs
+
+def _split(sep,lines):
+    if sep == 0:
+        return [[_line] for _line in lines]
+    return [_line.split(sep) for _line in lines]
+
+def run_host(register_obj,host):
+    ## cpu time in ns for each phase of one host
+    _times = dict.fromkeys(PHASES,0)
+    _clock = time.process_time_ns
+    _parsed = {}
+    for _name,(_sep,_lines) in host.items():
+        _start = _clock()
+        _table = _split(_sep,_lines)
+        _times["split"] += _clock() - _start
+        _section = register_obj.sections.get(_name)
+        _start = _clock()
+        _parsed[_name] = _section["parse_function"](_table) if _section else _table
+        _times["parse"] += _clock() - _start
+    for _plugin in register_obj.check_plugins.values():
+        _sections = _plugin.get("sections") or [_plugin["name"]]
+        if _sections[0] not in _parsed:
+            continue
+        _section = _parsed[_sections[0]]
+        _start = _clock()
+        _services = list(_plugin["discovery_function"](**_plugin_args(_plugin,_section,discovery=True)))
+        _times["discovery"] += _clock() - _start
+        _start = _clock()
+        for _service_obj in _services:
+            for _ in _plugin["check_function"](**_plugin_args(_plugin,_section,item=_service_obj.item)):
+                pass
+        _times["check"] += _clock() - _start
+    for _plugin in register_obj.inventory_plugins.values():
+        _sections = _plugin.get("sections") or [_plugin["name"]]
+        if _sections[0] not in _parsed:
+            continue
+        _start = _clock()
+        for _ in _plugin["inventory_function"](_parsed[_sections[0]]):
+            pass
+        _times["inventory"] += _clock() - _start
+    return _times
+
+def run_allocations(register_obj,host):
+    ## peak bytes allocated while one host is processed and bytes kept by the split and parsed sections
+    gc.collect()
+    tracemalloc.start()
+    _base = tracemalloc.get_traced_memory()[0]
+    _parsed = {}
+    _tables = {}
+    for _name,(_sep,_lines) in host.items():
+        _tables[_name] = _table = _split(_sep,_lines)
+        _section = register_obj.sections.get(_name)
+        _parsed[_name] = _section["parse_function"](_table) if _section else _table
+    _retained = tracemalloc.get_traced_memory()[0] - _base
+    run_host(register_obj,host)
+    _peak = tracemalloc.get_traced_memory()[1] - _base
+    tracemalloc.stop()
+    return _peak,_retained
+
+def _agent_lines(host,compact):
+    ## the sections as lines of the agent output with their separator
+    _sep = 0 if compact else "|"
+    return {_name : (_sep,[_row[0] if compact else "|".join(_row) for _row in _table]) for _name,_table in host.items()}
+
+def build_hosts(args):
+    _generator = section_generator(seed=args.seed,compact=args.compact)
+    _rnd = random.Random(args.seed)
+    return {
+        "switch"        : [_agent_lines(_generator.switch(_rnd.choice(args.switch_ports)),args.compact) for _ in range(args.hosts)],
+        "access point"  : [_agent_lines(_generator.access_point(_rnd.choice((2,3)),args.ssids),args.compact) for _ in range(args.hosts)],
+        "controller"    : [_agent_lines(_generator.controller(args.sites,args.devices_per_site,args.ssids),args.compact)],
+    }
+
+def benchmark(filename,hosts,repeat):
+    _register_obj = load_plugin(filename)
+    _result_data = {}
+    for _kind,_hosts in hosts.items():
+        _totals = dict.fromkeys(PHASES,0)
+        for _ in range(repeat):
+            for _host in _hosts:
+                for _phase,_ns in run_host(_register_obj,_host).items():
+                    _totals[_phase] += _ns
+        _count = repeat * len(_hosts)
+        _allocations = [run_allocations(_register_obj,_host) for _host in _hosts]
+        _result_data[_kind] = {
+            "cpu_ms"        : {_phase : _totals[_phase] / _count / 1e6 for _phase in PHASES},
+            "peak_kb"       : sum(_peak for _peak,_ in _allocations) / len(_allocations) / 1024,
+            "retained_kb"   : sum(_retained for _,_retained in _allocations) / len(_allocations) / 1024,
+        }
+    return _result_data
+
+def print_results(results):
+    _header = f"{'host':<14}{'plugin':<32}" + "".join(f"{_phase + ' ms':>14}" for _phase in PHASES) + f"{'total ms':>12}{'peak KB':>12}{'kept KB':>12}"
+    print(_header)
+    print("-" * len(_header))
+    _kinds = next(iter(results.values())).keys()
+    for _kind in _kinds:
+        for _plugin,_data in results.items():
+            _row = _data[_kind]
+            _cpu = _row["cpu_ms"]
+            print(f"{_kind:<14}{_plugin[-31:]:<32}" + "".join(f"{_cpu[_phase]:>14.3f}" for _phase in PHASES)
+                + f"{sum(_cpu.values()):>12.3f}{_row['peak_kb']:>12.1f}{_row['retained_kb']:>12.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark of the unifi check plugins, CPU time and allocations per host")
+    parser.add_argument("--plugin",dest="plugins",action="append",
+                        help="plugin file to benchmark, repeat to compare versions (default: the plugin of this repository)")
+    parser.add_argument("--compact",action="store_true",help="generate the sep(0) json sections of the agent option --compact")
+    parser.add_argument("--hosts",type=int,default=20,help="number of generated switches and access points")
+    parser.add_argument("--switch-ports",dest="switch_ports",type=lambda x: [int(_p) for _p in x.split(",")],default=[8,16,24,48,52],
+                        help="comma separated port counts of the generated switches")
+    parser.add_argument("--ssids",type=int,default=16,help="ssids per access point and site")
+    parser.add_argument("--sites",type=int,default=300,help="sites of the generated controller")
+    parser.add_argument("--devices-per-site",dest="devices_per_site",type=int,default=10)
+    parser.add_argument("--repeat",type=int,default=5)
+    parser.add_argument("--seed",type=int,default=0)
+    parser.add_argument("--json",dest="json_file",help="also write the results to this file")
+    args = parser.parse_args()
+
+    _hosts = build_hosts(args)
+    _results = {}
+    for _plugin in args.plugins or [DEFAULT_PLUGIN]:
+        _results[_plugin] = benchmark(_plugin,_hosts,args.repeat)
+    print_results(_results)
+    if args.json_file:
+        with open(args.json_file,"w") as _f:
+            json.dump(_results,_f,indent=2)
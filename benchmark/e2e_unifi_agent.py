@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8; py-indent-offset: 4 -*-
+#
+##  MIT License
+##
+##  Copyright (c) 2024 Bash Club
+##
+##  Permission is hereby granted, free of charge, to any person obtaining a copy
+##  of this software and associated documentation files (the "Software"), to deal
+##  in the Software without restriction, including without limitation the rights
+##  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+##  copies of the Software, and to permit persons to whom the Software is
+##  furnished to do so, subject to the following conditions:
+##
+##  The above copyright notice and this permission notice shall be included in all
+##  copies or substantial portions of the Software.
+##
+##  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+##  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+##  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+##  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+##  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+##  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+##  SOFTWARE.
+
+## End-to-end run of the special agent against mock_unifi_controller.py for several
+## estate sizes. Every run has to finish inside its wall time and peak RSS budget.
+##
+##  ./e2e_unifi_agent.py
+##  ./e2e_unifi_agent.py --scales 10,100 --latency 50 --jitter 20 --agent-args="--workers 8"
+##  ./e2e_unifi_agent.py --scales 1000 --agent-args="--workers 8 --stream" --budget 1000=120:300
+
+import argparse
+import os
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+AGENT = os.path.join(BENCHMARK_DIR,"..","share","check_mk","agents","special","agent_unifi_controller")
+MOCK = os.path.join(BENCHMARK_DIR,"mock_unifi_controller.py")
+
+## sites : (wall time seconds, peak rss MB) with 20 devices per site and no latency
+DEFAULT_BUDGETS = {
+    10      : (10,100),
+    100     : (40,200),
+    1000    : (240,1200),
+}
+
+class e2e_result(object):
+    def __init__(self,sites,wall,rss_mb,returncode,sections,piggyback_hosts,errors):
+        self.sites = sites
+        self.wall = wall
+        self.rss_mb = rss_mb
+        self.returncode = returncode
+        self.sections = sections
+        self.piggyback_hosts = piggyback_hosts
+        self.errors = errors
+
+def _free_port():
+    with socket.socket() as _socket:
+        _socket.bind(("127.0.0.1",0))
+        return _socket.getsockname()[1]
+
+def _wait_for_port(port,process,timeout=30):
+    _end = time.monotonic() + timeout
+    while time.monotonic() < _end:
+        if process.poll() is not None:
+            raise RuntimeError(f"mock controller exited with {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1",port),timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"mock controller not listening on port {port}")
+
+def start_mock(args,sites,port,certdir):
+    _cmd = [sys.executable,MOCK,"--port",str(port),"--sites",str(sites),"--devices-per-site",str(args.devices_per_site),
+            "--ssids",str(args.ssids),"--variant",args.variant,"--latency",str(args.latency),"--jitter",str(args.jitter),
+            "--error-rate",str(args.error_rate),"--clients-per-site",str(args.clients_per_site),
+            "--neighbors-per-site",str(args.neighbors_per_site),"--events-per-hour",str(args.events_per_hour),"--cert",os.path.join(certdir,"mock_cert.pem"),"--key",os.path.join(certdir,"mock_key.pem")]
+    _process = subprocess.Popen(_cmd,stdout=subprocess.DEVNULL,stderr=subprocess.PIPE)
+    _wait_for_port(port,_process)
+    return _process
+
+def run_agent(args,port,outfile):
+    ## wall time and peak rss of the agent process, the output goes to outfile
+    _cmd = [sys.executable,AGENT,"-u","admin","-p","admin","--ignore-cert","--port",str(port)] + shlex.split(args.agent_args) + ["127.0.0.1"]
+    with open(outfile,"wb") as _out:
+        _start = time.monotonic()
+        _process = subprocess.Popen(_cmd,stdout=_out,stderr=subprocess.PIPE)
+        _stderr = []
+        try:
+            _deadline = _start + args.timeout
+            while True:
+                _pid,_status,_rusage = os.wait4(_process.pid,os.WNOHANG)
+                if _pid:
+                    break
+                if time.monotonic() > _deadline:
+                    _process.kill()
+                    _pid,_status,_rusage = os.wait4(_process.pid,0)
+                    _stderr.append(f"killed after {args.timeout}s")
+                    break
+                time.sleep(0.02)
+        finally:
+            _wall = time.monotonic() - _start
+        _stderr.insert(0,_process.stderr.read().decode("utf-8","replace").strip())
+        _process.stderr.close()
+    _returncode = os.waitstatus_to_exitcode(_status)
+    ## ru_maxrss is in KB on Linux
+    return _wall,_rusage.ru_maxrss / 1024,_returncode,"\n".join(filter(None,_stderr))
+
+def inspect_output(outfile):
+    _sections = {}
+    _hosts = set()
+    with open(outfile,"r",errors="replace") as _f:
+        for _line in _f:
+            if _line.startswith("<<<<") and _line.rstrip().endswith(">>>>"):
+                _host = _line.strip()[4:-4]
+                if _host:
+                    _hosts.add(_host)
+            elif _line.startswith("<<<"):
+                _name = _line.strip()[3:-3].split(":")[0]
+                _sections[_name] = _sections.get(_name,0) + 1
+    return _sections,_hosts
+
+def run_scale(args,sites,certdir,outdir):
+    _port = _free_port()
+    _mock = start_mock(args,sites,_port,certdir)
+    try:
+        _outfile = os.path.join(outdir,f"agent_{sites}.txt")
+        _wall,_rss,_returncode,_stderr = run_agent(args,_port,_outfile)
+    finally:
+        _mock.terminate()
+        _mock.wait()
+    _sections,_hosts = inspect_output(_outfile)
+    _errors = []
+    if _returncode != 0:
+        _errors.append(f"agent exit code {_returncode}: {_stderr[-500:]}")
+    if args.variant != "unvr" and _returncode == 0:
+        if _sections.get("unifi_sites",0) < sites:
+            _errors.append(f"{_sections.get('unifi_sites',0)} of {sites} sites in the output")
+        if not _hosts:
+            _errors.append("no piggyback hosts in the output")
+    return e2e_result(sites,_wall,_rss,_returncode,_sections,_hosts,_errors)
+
+def parse_budget(value):
+    ## SITES=SECONDS:MB
+    _sites,_limits = value.split("=",1)
+    _seconds,_mb = _limits.split(":",1)
+    return int(_sites),(float(_seconds),float(_mb))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end wall time and peak RSS budgets of the unifi special agent")
+    parser.add_argument("--scales",default="10,100,1000",help="comma separated site counts")
+    parser.add_argument("--devices-per-site",dest="devices_per_site",type=int,default=20)
+    parser.add_argument("--ssids",type=int,default=4)
+    parser.add_argument("--clients-per-site",dest="clients_per_site",type=int,default=0,help="clients in /stat/sta, use with --agent-args=--clients")
+    parser.add_argument("--neighbors-per-site",dest="neighbors_per_site",type=int,default=0,help="neighbors in /stat/rogueap, use with --agent-args=\"--rogueap 24\"")
+    parser.add_argument("--events-per-hour",dest="events_per_hour",type=int,default=0,help="events per site and hour, use with --agent-args=--events")
+    parser.add_argument("--variant",choices=("classic","unifios","unvr"),default="classic")
+    parser.add_argument("--latency",type=float,default=0,help="mock response delay in ms")
+    parser.add_argument("--jitter",type=float,default=0,help="mock response jitter in ms")
+    parser.add_argument("--error-rate",dest="error_rate",type=float,default=0)
+    parser.add_argument("--agent-args",dest="agent_args",default="",help="extra arguments for the agent, e.g. \"--workers 8 --stream\"")
+    parser.add_argument("--budget",action="append",type=parse_budget,default=[],help="SITES=SECONDS:MB, overrides the default budget")
+    parser.add_argument("--timeout",type=float,default=900)
+    parser.add_argument("--output-dir",dest="output_dir",help="keep the agent output here")
+    args = parser.parse_args()
+
+    _budgets = dict(DEFAULT_BUDGETS)
+    _budgets.update(args.budget)
+    _outdir = args.output_dir or tempfile.mkdtemp(prefix="unifi_e2e_")
+    os.makedirs(_outdir,exist_ok=True)
+    _certdir = tempfile.mkdtemp(prefix="unifi_e2e_cert_")
+    subprocess.run(["openssl","req","-x509","-newkey","rsa:2048","-nodes","-days","1","-subj","/CN=localhost",
+                    "-keyout",os.path.join(_certdir,"mock_key.pem"),"-out",os.path.join(_certdir,"mock_cert.pem")],
+                   check=True,stdout=subprocess.DEVNULL,stderr=subprocess.DEVNULL)
+
+    _failed = False
+    print(f"{'sites':>7}{'devices':>9}{'wall s':>10}{'budget':>9}{'rss MB':>10}{'budget':>9}{'hosts':>8}  result")
+    for _sites in [int(_s) for _s in args.scales.split(",")]:
+        _result = run_scale(args,_sites,_certdir,_outdir)
+        _wall_budget,_rss_budget = _budgets.get(_sites,(float("inf"),float("inf")))
+        _errors = list(_result.errors)
+        if _result.wall > _wall_budget:
+            _errors.append(f"wall time {_result.wall:.1f}s > {_wall_budget:.0f}s")
+        if _result.rss_mb > _rss_budget:
+            _errors.append(f"peak rss {_result.rss_mb:.0f}MB > {_rss_budget:.0f}MB")
+        _failed = _failed or bool(_errors)
+        print(f"{_sites:>7}{_sites * args.devices_per_site:>9}{_result.wall:>10.2f}{_wall_budget:>9.0f}{_result.rss_mb:>10.1f}{_rss_budget:>9.0f}"
+              f"{len(_result.piggyback_hosts):>8}  {'FAIL: ' + '; '.join(_errors) if _errors else 'ok'}")
+    print(f"agent output in {_outdir}")
+    sys.exit(1 if _failed else 0)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8; py-indent-offset: 4 -*-
+#
+##  MIT License
+##
+##  Copyright (c) 2024 Bash Club
+##
+##  Permission is hereby granted, free of charge, to any person obtaining a copy
+##  of this software and associated documentation files (the "Software"), to deal
+##  in the Software without restriction, including without limitation the rights
+##  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+##  copies of the Software, and to permit persons to whom the Software is
+##  furnished to do so, subject to the following conditions:
+##
+##  The above copyright notice and this permission notice shall be included in all
+##  copies or substantial portions of the Software.
+##
+##  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+##  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+##  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+##  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+##  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+##  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+##  SOFTWARE.
+
+## Peak RSS of the special agent against the number of devices on one site of
+## mock_unifi_controller.py. Every agent file given with --agent runs against the same
+## mock, so an older version of the agent can be compared with the current one.
+##
+##  ./memory_unifi_agent.py
+##  ./memory_unifi_agent.py --devices 1000,3000,5000 --agent old_agent --agent ../share/check_mk/agents/special/agent_unifi_controller
+##  ./memory_unifi_agent.py --agent-args="--stream"
+
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0,BENCHMARK_DIR)
+from e2e_unifi_agent import AGENT, MOCK, _free_port, _wait_for_port
+from mock_unifi_controller import unifi_estate
+
+def run_agent(agent,agent_args,port,timeout):
+    ## wall time and peak rss of one agent run, stderr is read after the exit
+    _cmd = [sys.executable,agent,"-u","admin","-p","admin","--ignore-cert","--port",str(port)] + shlex.split(agent_args) + ["127.0.0.1"]
+    with tempfile.TemporaryFile() as _stderr:
+        _start = time.monotonic()
+        _process = subprocess.Popen(_cmd,stdout=subprocess.DEVNULL,stderr=_stderr)
+        while True:
+            _pid,_status,_rusage = os.wait4(_process.pid,os.WNOHANG)
+            if _pid:
+                break
+            if time.monotonic() - _start > timeout:
+                _process.kill()
+                _pid,_status,_rusage = os.wait4(_process.pid,0)
+                break
+            time.sleep(0.02)
+        _wall = time.monotonic() - _start
+        _stderr.seek(0)
+        _message = _stderr.read().decode("utf-8","replace").strip()
+    ## ru_maxrss is in KB on Linux
+    return _wall,_rusage.ru_maxrss / 1024,os.waitstatus_to_exitcode(_status),_message
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Peak RSS of the unifi special agent against the device count")
+    parser.add_argument("--devices",default="500,1000,2000,5000",help="comma separated device counts of the single site")
+    parser.add_argument("--agent",dest="agents",action="append",help="agent file, repeat to compare versions (default: the agent of this repository)")
+    parser.add_argument("--agent-args",dest="agent_args",default="",help="extra arguments for every agent run, e.g. \"--stream\"")
+    parser.add_argument("--ssids",type=int,default=4)
+    parser.add_argument("--timeout",type=float,default=600)
+    args = parser.parse_args()
+
+    _certdir = tempfile.mkdtemp(prefix="unifi_memory_cert_")
+    subprocess.run(["openssl","req","-x509","-newkey","rsa:2048","-nodes","-days","1","-subj","/CN=localhost",
+                    "-keyout",os.path.join(_certdir,"mock_key.pem"),"-out",os.path.join(_certdir,"mock_cert.pem")],
+                   check=True,stdout=subprocess.DEVNULL,stderr=subprocess.DEVNULL)
+    _agents = args.agents or [AGENT]
+    print(f"{'devices':>8}{'body MB':>9}  {'agent':<32}{'wall s':>8}{'rss MB':>9}{'KB/device':>11}")
+    for _devices in [int(_d) for _d in args.devices.split(",")]:
+        _body = len(unifi_estate(1,_devices,args.ssids).devices_body("default")) / 2**20
+        _port = _free_port()
+        _mock = subprocess.Popen([sys.executable,MOCK,"--port",str(_port),"--sites","1","--devices-per-site",str(_devices),"--ssids",str(args.ssids),
+                                  "--cert",os.path.join(_certdir,"mock_cert.pem"),"--key",os.path.join(_certdir,"mock_key.pem")],
+                                 stdout=subprocess.DEVNULL,stderr=subprocess.DEVNULL)
+        try:
+            _wait_for_port(_port,_mock)
+            for _agent in _agents:
+                _wall,_rss,_returncode,_stderr = run_agent(_agent,args.agent_args,_port,args.timeout)
+                _result = f"{_rss:>9.1f}{_rss * 1024 / _devices:>11.1f}" if _returncode == 0 else f"  FAIL rc={_returncode}: {_stderr[-200:]}"
+                print(f"{_devices:>8}{_body:>9.1f}  {os.path.basename(_agent)[-32:]:<32}{_wall:>8.2f}{_result}")
+        finally:
+            _mock.terminate()
+            _mock.wait()
@@ -0,0 +1,655 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8; py-indent-offset: 4 -*-
+#
+##  MIT License
+##
+##  Copyright (c) 2024 Bash Club
+##
+##  Permission is hereby granted, free of charge, to any person obtaining a copy
+##  of this software and associated documentation files (the "Software"), to deal
+##  in the Software without restriction, including without limitation the rights
+##  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+##  copies of the Software, and to permit persons to whom the Software is
+##  furnished to do so, subject to the following conditions:
+##
+##  The above copyright notice and this permission notice shall be included in all
+##  copies or substantial portions of the Software.
+##
+##  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+##  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+##  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+##  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+##  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+##  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+##  SOFTWARE.
+
+## Local stand-in for the UniFi controller API used by agent_unifi_controller.
+## Serves a generated estate as classic controller, UniFi OS console or UNVR over https
+## with optional latency, jitter and error injection.
+##
+##  ./mock_unifi_controller.py --port 8443 --sites 100 --devices-per-site 20 --variant unifios --latency 50 --jitter 20
+##  ../share/check_mk/agents/special/agent_unifi_controller -u admin -p admin --ignore-cert --port 8443 127.0.0.1
+##
+## Without --cert/--key a self signed certificate is created with openssl.
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import queue
+import random
+import re
+import select
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+UNIFI_OS_IDS = {
+    "classic"   : None,
+    "unifios"   : "UDMPRO",
+    "unvr"      : "UNVR",
+}
+MOCK_MODELS = (
+    ("usw","US48PRO",52),
+    ("usw","US24P250",26),
+    ("usw","USL8LP",8),
+    ("uap","U6PRO",0),
+    ("uap","U7PG2",0),
+    ("uap","UAL6",0),
+)
+
+def _mac(site,index):
+    return "f0:9f:c2:{0:02x}:{1:02x}:{2:02x}".format(site % 256,index // 256,index % 256)
+
+class unifi_estate(object):
+    ## generated sites and devices, the json bodies are rendered once per site and reused
+    def __init__(self,sites,devices_per_site,ssids,seed=0,gateway=True,clients_per_site=0,neighbors_per_site=0,events_per_hour=0):
+        self.seed = seed
+        self.devices_per_site = devices_per_site
+        self.ssids = ssids
+        self.clients_per_site = clients_per_site
+        self.neighbors_per_site = neighbors_per_site
+        self.events_per_hour = events_per_hour
+        self.gateway = gateway
+        self.sites = [{
+            "_id"           : f"{site:024x}",
+            "name"          : "default" if site == 0 else f"site{site:05d}",
+            "desc"          : "Default" if site == 0 else f"Site {site:05d}",
+            "attr_hidden_id": "default" if site == 0 else "",
+            "num_new_alarms": site % 3,
+            "health"        : [
+                {"subsystem" : "wlan", "num_user" : 20 + site % 7, "num_guest" : site % 5, "num_iot" : 0, "tx_bytes-r" : 1024 * site,
+                 "rx_bytes-r" : 2048 * site, "status" : "ok", "num_ap" : 4, "num_adopted" : 4, "num_disabled" : 0, "num_disconnected" : 0},
+                {"subsystem" : "lan", "num_user" : 30, "num_guest" : 2, "num_iot" : 0, "tx_bytes-r" : 4096, "rx_bytes-r" : 8192,
+                 "status" : "ok", "num_sw" : 2, "num_adopted" : 2, "num_disconnected" : 0},
+                {"subsystem" : "wan", "status" : "ok" if gateway else "unknown"},
+                {"subsystem" : "www", "status" : "ok", "latency" : 12, "uptime" : 123456},
+                {"subsystem" : "vpn", "status" : "unknown"},
+            ]
+        } for site in range(sites)]
+        self._site_index = {_site["name"] : _number for _number,_site in enumerate(self.sites)}
+        self._devices = {}
+        self._bodies = {}
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def has_site(self,name):
+        return name in self._site_index
+
+    def devices(self,name):
+        with self._lock:
+            _devices = self._devices.get(name)
+            if _devices is None:
+                _devices = self._devices[name] = self._generate_devices(self._site_index[name])
+            return _devices
+
+    def devices_body(self,name):
+        ## full /stat/device response, kept as bytes so large estates are served fast
+        _body = self._bodies.get(name)
+        if _body is None:
+            _body = self._bodies[name] = json.dumps({"meta" : {"rc" : "ok"}, "data" : self.devices(name)}).encode("utf-8")
+        return _body
+
+    def _generate_devices(self,site):
+        _rnd = random.Random(self.seed * 1000003 + site)
+        _devices = []
+        _gateway_mac = _mac(site,0)
+        for _index in range(self.devices_per_site):
+            if _index == 0 and self.gateway:
+                _devices.append(self._device(_rnd,site,_index,"udm","UDMPRO",11,None))
+                continue
+            _type,_model,_ports = MOCK_MODELS[_index % len(MOCK_MODELS)]
+            _uplink = _gateway_mac if _index < 4 else _mac(site,1 + _index % 3)
+            _devices.append(self._device(_rnd,site,_index,_type,_model,_ports,_uplink))
+        return _devices
+
+    def _device(self,rnd,site,index,devicetype,model,ports,uplink_mac):
+        _mac_address = _mac(site,index)
+        _device = {
+            "_id"               : f"{site:012x}{index:012x}",
+            "mac"               : _mac_address,
+            "model"             : model,
+            "type"              : devicetype,
+            "name"              : f"{devicetype}-{site:05d}-{index:04d}",
+            "adopted"           : index % 25 != 24,
+            "state"             : 0 if index % 40 == 39 else 1,
+            "ip"                : f"10.{site // 256 % 256}.{site % 256}.{index % 250 + 1}",
+            "version"           : "6.6.55.15189",
+            "serial"            : _mac_address.replace(":","").upper(),
+            "uptime"            : rnd.randint(1000,10**7),
+            "num_sta"           : rnd.randint(0,60),
+            "user-num_sta"      : rnd.randint(0,50),
+            "guest-num_sta"     : rnd.randint(0,10),
+            "satisfaction"      : rnd.randint(60,100),
+            "upgradable"        : False,
+            "upgradeable"       : False,
+            "site_id"           : f"{site:024x}",
+            "board_rev"         : 12,
+            "cfgversion"        : "0123456789abcdef",
+            "x_authkey"         : "0123456789abcdef0123456789abcdef",
+            "x_fingerprint"     : "aa:bb:cc:dd:ee:ff:00:11:22:33:44:55:66:77:88:99",
+            "system-stats"      : {"cpu" : f"{rnd.random() * 30:.1f}", "mem" : f"{rnd.random() * 80:.1f}", "uptime" : "123456"},
+            "sys_stats"         : {"loadavg_1" : f"{rnd.random():.2f}", "loadavg_5" : f"{rnd.random():.2f}", "loadavg_15" : f"{rnd.random():.2f}",
+                                   "mem_buffer" : 0, "mem_total" : 1028292608, "mem_used" : rnd.randint(10**8,10**9)},
+            "temperatures"      : [{"name" : "CPU", "type" : "cpu", "value" : rnd.uniform(40,70)}] if devicetype != "uap" else [],
+            "config_network"    : {"type" : "dhcp", "ip" : "10.0.0.1"},
+            "ethernet_table"    : [{"mac" : _mac_address, "num_port" : ports, "name" : "eth0"}],
+            "stat"              : {"ap" : {}, "sw" : {"rx_bytes" : rnd.randint(0,10**12)}},
+            "lldp_table"        : [{"local_port_idx" : ports, "chassis_id" : uplink_mac, "port_id" : "Port 1", "is_wired" : True}] if uplink_mac else [],
+        }
+        if uplink_mac:
+            _device["uplink"] = {"up" : True, "uplink_mac" : uplink_mac, "uplink_remote_port" : 1 + index % 24, "type" : "wire",
+                                 "speed" : 1000, "full_duplex" : True, "rx_bytes" : rnd.randint(0,10**12), "tx_bytes" : rnd.randint(0,10**12)}
+        else:
+            _device["uplink"] = {"up" : True, "type" : "wire", "name" : "eth8"}
+        if devicetype in ("usw","udm"):
+            _device["port_table"] = [self._port(rnd,_idx,ports) for _idx in range(1,ports + 1)]
+            _device["fan_level"] = rnd.randint(0,100) if ports > 24 else None
+        if devicetype == "udm":
+            _device["connect_request_ip"] = f"10.{site // 256 % 256}.{site % 256}.1"
+            _device["ethernet_overrides"] = [{"ifname" : "eth8", "networkgroup" : "WAN"},{"ifname" : "eth9", "networkgroup" : "WAN2"}]
+            _device["port_table"][-1].update({"ifname" : "eth8", "name" : "WAN"})
+            _device["speedtest_status_saved"] = True
+            _device["speedtest-status"] = {"rundate" : 1700000000, "status_summary" : 2, "latency" : 12.3, "xput_download" : 912.4, "xput_upload" : 95.1}
+            _device["speedtest_status"] = _device["speedtest-status"]
+        if devicetype == "uap":
+            _radios = [("ng",6,"wifi0"),("na",36,"wifi1")] + ([("6e",37,"wifi2")] if model == "U6PRO" else [])
+            _device["radio_table"] = [{"name" : _name, "radio" : _radio, "channel" : _channel, "ht" : 40, "tx_power_mode" : "auto"} for _radio,_channel,_name in _radios]
+            _device["radio_table_stats"] = [{"name" : _name, "radio" : _radio, "channel" : _channel, "satisfaction" : rnd.randint(50,100),
+                "num_sta" : rnd.randint(0,30), "user-num_sta" : rnd.randint(0,25), "guest-num_sta" : rnd.randint(0,5), "cu_total" : rnd.randint(0,100),
+                "tx_packets" : rnd.randint(0,10**8), "tx_retries" : rnd.randint(0,10**6)} for _radio,_channel,_name in _radios]
+            _device["stat"]["ap"] = {f"{_name}-{_k}" : float(rnd.randint(0,10**9)) for _radio,_channel,_name in _radios for _k in ("rx_bytes","tx_bytes","rx_packets","tx_packets")}
+            _device["vap_table"] = [{
+                "essid" : f"wlan-{_ssid:02d}", "radio" : _radio, "radio_name" : _name, "channel" : _channel, "bssid" : _mac_address,
+                "num_sta" : rnd.randint(0,20), "satisfaction" : rnd.randint(-1,100), "avg_client_signal" : rnd.randint(-85,-40),
+                "tcp_packet_loss" : rnd.randint(0,20), "wifi_retries" : rnd.randint(0,50), "wifi_latency" : rnd.randint(0,80),
+                "is_guest" : _ssid % 4 == 3, "up" : True, "usage" : "user", "rx_bytes" : rnd.randint(0,10**10), "tx_bytes" : rnd.randint(0,10**10),
+                "reasons_bar_chart_now" : {"phy_rate" : rnd.randint(0,5), "signal" : rnd.randint(0,5), "tx_retry" : rnd.randint(0,5)},
+                "anomalies_bar_chart" : {"high_tcp_latency" : 0, "poor_stream_eff" : 0},
+                "scan_table" : [{"bssid" : _mac(site,_n), "rssi" : -70} for _n in range(5)],
+            } for _ssid in range(self.ssids) for _radio,_channel,_name in _radios]
+        return _device
+
+    def _port(self,rnd,index,ports):
+        _up = rnd.random() > 0.3 or index == ports
+        return {
+            "port_idx" : index, "name" : f"Port {index}", "media" : "GE", "port_poe" : index <= ports // 2, "poe_caps" : 7,
+            "op_mode" : "switch", "poe_mode" : "auto", "anomalies" : 0, "autoneg" : True, "dot1x_mode" : "unknown",
+            "dot1x_status" : "disabled", "enable" : True, "full_duplex" : True, "is_uplink" : index == ports, "jumbo" : False,
+            "poe_class" : "Class 4", "poe_current" : f"{rnd.uniform(0,200):.2f}", "poe_enable" : _up and index <= ports // 2,
+            "poe_good" : _up, "poe_power" : f"{rnd.uniform(0,15):.2f}", "poe_voltage" : f"{rnd.uniform(48,54):.2f}",
+            "rx_broadcast" : rnd.randint(0,10**6), "rx_bytes" : rnd.randint(0,10**12), "rx_dropped" : rnd.randint(0,100),
+            "rx_errors" : 0, "rx_multicast" : rnd.randint(0,10**6), "rx_packets" : rnd.randint(0,10**9),
+            "satisfaction" : rnd.randint(50,100), "satisfaction_reason" : 0, "speed" : 1000 if _up else 0,
+            "speed_caps" : 1048623, "stp_pathcost" : 20000, "stp_state" : "forwarding" if _up else "disabled",
+            "tx_broadcast" : rnd.randint(0,10**6), "tx_bytes" : rnd.randint(0,10**12), "tx_dropped" : 0, "tx_errors" : 0,
+            "tx_multicast" : rnd.randint(0,10**6), "tx_packets" : rnd.randint(0,10**9), "up" : _up,
+            "tx_bytes-r" : rnd.randint(0,10**6), "rx_bytes-r" : rnd.randint(0,10**6), "bytes-r" : rnd.randint(0,10**6),
+            "portconf_id" : "000000000000000000000001", "masked" : False, "aggregated_by" : False, "flowctrl_rx" : False, "flowctrl_tx" : False,
+            "mac_table" : [{"mac" : _mac(index,_n), "age" : 10, "vlan" : 1} for _n in range(3)],
+        }
+
+    def clients_body(self,name):
+        ## /stat/sta is rendered on every request, large client lists are not kept in memory
+        _site = self._site_index[name]
+        _rnd = random.Random(self.seed * 1000003 + _site)
+        _aps = [_device for _device in self.devices(name) if _device["type"] == "uap"]
+        _clients = []
+        for _index in range(self.clients_per_site if _aps else 0):
+            _ap = _aps[_index % len(_aps)]
+            _vap = _ap["vap_table"][_rnd.randrange(len(_ap["vap_table"]))]
+            _signal = int(_rnd.gauss(-62,10))
+            _clients.append({
+                "_id" : f"{_site:012x}{_index:012x}", "mac" : "a4:83:e7:{0:02x}:{1:02x}:{2:02x}".format(_site % 256,_index // 256 % 256,_index % 256),
+                "site_id" : f"{_site:024x}", "ap_mac" : _ap["mac"], "essid" : _vap["essid"], "bssid" : _vap["bssid"], "radio" : _vap["radio"],
+                "radio_proto" : "ax" if _vap["radio"] != "ng" else "ng", "channel" : _vap["channel"], "is_wired" : False,
+                "is_guest" : _vap["is_guest"], "hostname" : f"client-{_index:05d}", "oui" : "Apple", "ip" : f"172.16.{_index // 250 % 256}.{_index % 250 + 1}",
+                "signal" : _signal, "rssi" : _signal + 95, "noise" : -95, "tx_rate" : _rnd.choice((6000,54000,144400,286700,573500,866700,1200900)),
+                "rx_rate" : _rnd.choice((6000,24000,72200,144400,286700,433300,866700)), "satisfaction" : max(0,min(100,int(_rnd.gauss(85,15)))),
+                "uptime" : _rnd.randint(60,10**6), "tx_bytes" : _rnd.randint(0,10**10), "rx_bytes" : _rnd.randint(0,10**10),
+                "tx_packets" : _rnd.randint(0,10**7), "rx_packets" : _rnd.randint(0,10**7), "tx_retries" : _rnd.randint(0,10**5),
+                "first_seen" : 1700000000, "last_seen" : 1700001000, "authorized" : True, "qos_policy_applied" : True,
+            })
+        for _index in range(self.clients_per_site // 10):
+            _clients.append({"_id" : f"{_site:012x}w{_index:011x}", "mac" : "00:0c:29:{0:02x}:{1:02x}:{2:02x}".format(_site % 256,_index // 256 % 256,_index % 256),
+                             "is_wired" : True, "is_guest" : False, "sw_mac" : _mac(_site,1), "sw_port" : 1 + _index % 24, "hostname" : f"wired-{_index:05d}"})
+        return json.dumps({"meta" : {"rc" : "ok"}, "data" : _clients}).encode("utf-8")
+
+    def rogueap_body(self,name):
+        ## every neighbor bssid is heard by up to three access points like in a dense building
+        _site = self._site_index[name]
+        _rnd = random.Random(self.seed * 1000003 + _site + 7)
+        _aps = [_device for _device in self.devices(name) if _device["type"] == "uap"]
+        _neighbors = []
+        for _index in range(self.neighbors_per_site if _aps else 0):
+            _radio = _rnd.choice(("ng","ng","na","na","6e"))
+            _channel = _rnd.choice({"ng" : (1,6,11), "na" : (36,40,44,48,52,100,116,149), "6e" : (5,37,69)}[_radio])
+            _bssid = "02:{0:02x}:{1:02x}:{2:02x}:{3:02x}:{4:02x}".format(_site % 256,_site // 256 % 256,_index // 65536 % 256,_index // 256 % 256,_index % 256)
+            for _ap in _rnd.sample(_aps,min(len(_aps),_rnd.randint(1,3))):
+                _signal = int(_rnd.gauss(-78,8))
+                _neighbors.append({
+                    "_id" : f"{_site:08x}{_index:08x}{_ap['mac'][-5:].replace(':','')}", "ap_mac" : _ap["mac"], "bssid" : _bssid,
+                    "essid" : f"neighbor-{_index % 500:03d}", "radio" : _radio, "channel" : _channel, "freq" : 2412 if _radio == "ng" else 5180,
+                    "signal" : _signal, "rssi" : _signal + 95, "noise" : -95, "is_rogue" : _rnd.random() < 0.002, "is_adhoc" : False,
+                    "age" : _rnd.randint(0,3600), "last_seen" : 1700000000, "security" : "wpa2", "oui" : "Other", "site_id" : f"{_site:024x}",
+                })
+        return json.dumps({"meta" : {"rc" : "ok"}, "data" : _neighbors}).encode("utf-8")
+
+    def events_body(self,name,body,alarm=False):
+        ## an endless history, one event every 3600/events_per_hour seconds, only the requested window is rendered
+        _site = self._site_index[name]
+        _body = body or {}
+        _events = []
+        if self.events_per_hour:
+            _period = 3600000 // self.events_per_hour
+            _now = int(time.time() * 1000)
+            _oldest = _now - int(_body.get("within",24 * 365)) * 3600000
+            _limit = int(_body.get("_limit",3000))
+            _index = _now // _period
+            while len(_events) < _limit and _index * _period >= _oldest:
+                _rnd = random.Random(_site * 1000003 + _index)
+                _time = _index * _period
+                _index -= 1
+                if alarm and _rnd.random() > 0.1:
+                    continue
+                _device_mac = _mac(_site,_rnd.randrange(max(1,self.devices_per_site)))
+                _key,_msg = _rnd.choice((
+                    ("EVT_AP_Lost_Contact",f"AP[{_device_mac}] was disconnected"),
+                    ("EVT_AP_Connected",f"AP[{_device_mac}] was connected"),
+                    ("EVT_SW_PoeDisconnect",f"Switch[{_device_mac}] detected PoE disconnect on port 3"),
+                    ("EVT_WU_Connected",f"User[a4:83:e7:00:00:01] has connected to AP[{_device_mac}]"),
+                    ("EVT_AD_Login","Admin[admin] log in from 127.0.0.1"),
+                ))
+                _events.append({"_id" : f"{_site:08x}{_time:016x}", "time" : _time,
+                                "datetime" : time.strftime("%Y-%m-%dT%H:%M:%SZ",time.gmtime(_time / 1000)),
+                                "key" : _key, "msg" : _msg, "subsystem" : "wlan", "site_id" : f"{_site:024x}", "archived" : False})
+        return json.dumps({"meta" : {"rc" : "ok"}, "data" : _events}).encode("utf-8")
+
+    def device_update(self,name,rnd):
+        ## changes one device of the site and returns the changed fields like a device:update message
+        _device = rnd.choice(self.devices(name))
+        _update = {"mac" : _device["mac"], "num_sta" : rnd.randint(0,40), "satisfaction" : rnd.randint(50,100), "uptime" : _device["uptime"] + 1}
+        with self._lock:
+            _device.update(_update)
+            self._bodies.pop(name,None)
+        return _update
+
+    def subscribe(self,name):
+        ## queue of the messages for one websocket connection of the site
+        _messages = queue.Queue()
+        with self._lock:
+            self._subscribers.setdefault(name,[]).append(_messages)
+        return _messages
+
+    def unsubscribe(self,name,messages):
+        with self._lock:
+            self._subscribers[name].remove(messages)
+
+    def push(self,name,message):
+        ## sends the message on every open websocket of the site, None closes them, returns the number of connections
+        with self._lock:
+            _subscribers = list(self._subscribers.get(name,[]))
+        for _messages in _subscribers:
+            _messages.put(message)
+        return len(_subscribers)
+
+    def basic_devices(self,name):
+        return [{_k : _device[_k] for _k in ("mac","state","adopted","type","model","name") if _k in _device} for _device in self.devices(name)]
+
+    def protect(self,path):
+        ## timestamps in milliseconds like the protect api
+        _rnd = random.Random(self.seed)
+        _now = int(time.time() * 1000)
+        if path == "/nvr":
+            return {"id" : "nvr", "modelKey" : "nvr", "name" : "unvr", "type" : "UNVR", "marketName" : "UNVR", "version" : "3.0.22",
+                    "firmwareVersion" : "3.2.9", "host" : "127.0.0.1", "mac" : "F09FC2FA0000", "upSince" : _now - 123456000,
+                    "isConnectedToCloud" : True, "isRecordingDisabled" : False, "recordingRetentionDurationMs" : 30 * 86400000,
+                    "availableUpdate" : None, "temperature" : 41,
+                    "storageInfo" : {"totalSize" : 16 * 10**12, "totalSpaceUsed" : 9 * 10**12,
+                                     "hardDrives" : [{"name" : f"disk{_n}", "size" : 4 * 10**12, "status" : "OK", "health" : "good"} for _n in range(4)]},
+                    "systemInfo" : {"cpu" : {"averageLoad" : 23.5, "temperature" : 52.0},
+                                    "storage" : {"size" : 16 * 10**12, "used" : 9 * 10**12, "isRecycling" : False, "type" : "raid"}}}
+        _count = max(1,self.devices_per_site)
+        if path == "/cameras":
+            return [{"id" : f"cam{_n:04d}", "modelKey" : "camera", "name" : f"camera-{_n:04d}", "mac" : _mac(250,_n).replace(":","").upper(), "type" : "UVC G4 Bullet",
+                     "marketName" : "G4 Bullet", "host" : f"10.250.{_n // 250}.{_n % 250 + 1}", "isAdopted" : True,
+                     "state" : "CONNECTED" if _n % 20 else "DISCONNECTED", "isRecording" : _n % 20 != 0, "firmwareVersion" : "4.69.55",
+                     "upSince" : _now - 86400000, "lastMotion" : _now - _rnd.randint(0,3600000), "recordingSettings" : {"mode" : "always"},
+                     "channels" : [{"id" : 0, "name" : "High", "enabled" : True, "fps" : 24, "bitrate" : 10000000, "width" : 2688, "height" : 1512},
+                                   {"id" : 1, "name" : "Medium", "enabled" : True, "fps" : 24, "bitrate" : 2000000, "width" : 1280, "height" : 720}],
+                     "wiredConnectionState" : {"phyRate" : 100},
+                     "stats" : {"rxBytes" : _rnd.randint(0,10**10), "txBytes" : _rnd.randint(0,10**10)}}
+                    for _n in range(_count)]
+        if path == "/sensors":
+            return [{"id" : f"sensor{_n:04d}", "modelKey" : "sensor", "name" : f"sensor-{_n:04d}", "mac" : _mac(251,_n).replace(":","").upper(), "type" : "UFP-SENSE",
+                     "marketName" : "UP Sense", "state" : "CONNECTED", "isAdopted" : True, "upSince" : _now - 3600000, "mountType" : "door", "isOpened" : False,
+                     "batteryStatus" : {"percentage" : _rnd.randint(5,100), "isLow" : False}, "bluetoothConnectionState" : {"signalStrength" : -_rnd.randint(40,90)},
+                     "stats" : {"temperature" : {"value" : _rnd.uniform(15,30)}, "humidity" : {"value" : _rnd.randint(20,70)}, "light" : {"value" : _rnd.randint(0,1000)}}}
+                    for _n in range(max(1,_count // 4))]
+        return None
+
+class mock_settings(object):
+    def __init__(self,args):
+        self.variant = args.variant
+        self.latency = args.latency / 1000.0
+        self.jitter = args.jitter / 1000.0
+        self.error_rate = args.error_rate
+        self.error_status = args.error_status
+        self.session_lifetime = args.session_lifetime
+        self.websocket_updates = args.websocket_updates
+        self.username = args.username
+        self.password = args.password
+        self.random = random.Random(args.seed)
+        self.sessions = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+class unifi_mock_handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "unifi-mock"
+    ## headers and body are written separately, without TCP_NODELAY every small response waits for the delayed ack
+    disable_nagle_algorithm = True
+    ESTATE = None
+    SETTINGS = None
+
+    def log_message(self,format,*args):
+        pass
+
+    def _send(self,status,body,content_type="application/json",headers=()):
+        if not isinstance(body,bytes):
+            body = (body if isinstance(body,str) else json.dumps(body)).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type",content_type)
+        self.send_header("Content-Length",str(len(body)))
+        for _name,_value in headers:
+            self.send_header(_name,_value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_data(self,data):
+        if isinstance(data,bytes):
+            return self._send(200,data)
+        self._send(200,{"meta" : {"rc" : "ok"}, "data" : data})
+
+    def _error(self,status,msg):
+        self._send(status,{"meta" : {"rc" : "error", "msg" : msg}, "data" : []})
+
+    def _delay(self):
+        _settings = self.SETTINGS
+        _delay = _settings.latency
+        if _settings.jitter:
+            with _settings.lock:
+                _delay += _settings.random.uniform(-_settings.jitter,_settings.jitter)
+        if _delay > 0:
+            time.sleep(_delay)
+
+    def _inject_error(self):
+        _settings = self.SETTINGS
+        if not _settings.error_rate:
+            return False
+        with _settings.lock:
+            return _settings.random.random() < _settings.error_rate
+
+    def _session_valid(self):
+        _cookie = self.headers.get("Cookie") or ""
+        _token = re.search(r"(?:unifises|TOKEN)=(\w+)",_cookie)
+        if not _token:
+            return False
+        _settings = self.SETTINGS
+        _created = _settings.sessions.get(_token.group(1))
+        if _created is None:
+            return False
+        if _settings.session_lifetime and time.time() - _created > _settings.session_lifetime:
+            return False
+        return True
+
+    def _login(self,unifios):
+        _length = int(self.headers.get("Content-Length",0))
+        try:
+            _auth = json.loads(self.rfile.read(_length) or b"{}")
+        except ValueError:
+            _auth = {}
+        if _auth.get("username") != self.SETTINGS.username or _auth.get("password") != self.SETTINGS.password:
+            return self._error(400 if not unifios else 401,"api.err.Invalid")
+        _token = "%032x" % self.SETTINGS.random.getrandbits(128)
+        self.SETTINGS.sessions[_token] = time.time()
+        _cookie = f"{'TOKEN' if unifios else 'unifises'}={_token}; Path=/; Secure; HttpOnly"
+        _headers = [("Set-Cookie",_cookie),("X-CSRF-Token","%032x" % self.SETTINGS.random.getrandbits(128))]
+        if unifios:
+            return self._send(200,{"unique_id" : "admin", "username" : _auth.get("username"), "status" : "ACTIVE"},headers=_headers)
+        self._send(200,{"meta" : {"rc" : "ok"}, "data" : []},headers=_headers)
+
+    def _websocket(self,site):
+        ## events endpoint of the site, every connection gets websocket_updates device:update messages per second
+        ## and the messages pushed to the estate
+        _key = self.headers.get("Sec-WebSocket-Key","")
+        _accept = base64.b64encode(hashlib.sha1((_key + "258EAFA5-E914-47DA-95CA-C5AB0DC85B11").encode("ascii")).digest()).decode("ascii")
+        self.close_connection = True
+        _rnd = random.Random()
+        _interval = 1.0 / self.SETTINGS.websocket_updates if self.SETTINGS.websocket_updates > 0 else None
+        ## before the handshake, so nothing pushed after the client saw the connection open is lost
+        _messages = self.ESTATE.subscribe(site)
+        try:
+            self.send_response(101)
+            self.send_header("Upgrade","websocket")
+            self.send_header("Connection","Upgrade")
+            self.send_header("Sec-WebSocket-Accept",_accept)
+            self.end_headers()
+            self.wfile.flush()
+            while True:
+                if select.select([self.connection],[],[],0)[0]:
+                    _opcode,_payload = self._read_frame()
+                    if _opcode is None:
+                        return
+                    if _opcode == 0x8:
+                        ## answer the close of the client, it waits for it
+                        self._send_frame(_payload,0x8)
+                        return
+                    if _opcode == 0x9:
+                        self._send_frame(_payload,0xa)
+                try:
+                    _message = _messages.get(timeout=_interval or 0.1)
+                except queue.Empty:
+                    if _interval is None:
+                        continue
+                    _message = {"meta" : {"rc" : "ok", "message" : "device:update"}, "data" : [self.ESTATE.device_update(site,_rnd)]}
+                    self._count(f"/wss/s/{site}/events device:update")
+                if _message is None:
+                    return
+                self._send_frame(json.dumps(_message).encode("utf-8"))
+        except (OSError,ValueError):
+            return
+        finally:
+            self.ESTATE.unsubscribe(site,_messages)
+
+    def _read_frame(self):
+        ## opcode and unmasked payload of the next client frame, None at the end of the connection
+        _header = self.rfile.read(2)
+        if len(_header) < 2:
+            return None,b""
+        _length = _header[1] & 0x7f
+        if _length == 126:
+            _length = int.from_bytes(self.rfile.read(2),"big")
+        elif _length == 127:
+            _length = int.from_bytes(self.rfile.read(8),"big")
+        _mask = self.rfile.read(4) if _header[1] & 0x80 else b"\0\0\0\0"
+        _payload = bytes(_byte ^ _mask[_index % 4] for _index,_byte in enumerate(self.rfile.read(_length)))
+        return _header[0] & 0x0f,_payload
+
+    def _send_frame(self,message,opcode=0x1):
+        ## unmasked frame, text by default
+        if len(message) < 126:
+            _header = bytes([0x80 | opcode,len(message)])
+        elif len(message) < 65536:
+            _header = bytes([0x80 | opcode,126]) + len(message).to_bytes(2,"big")
+        else:
+            _header = bytes([0x80 | opcode,127]) + len(message).to_bytes(8,"big")
+        self.wfile.write(_header + message)
+        self.wfile.flush()
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def _count(self,path):
+        with self.SETTINGS.lock:
+            self.SETTINGS.counters[path] = self.SETTINGS.counters.get(path,0) + 1
+
+    def _handle(self,method):
+        _path = urlparse(self.path).path
+        _variant = self.SETTINGS.variant
+        _unifios = UNIFI_OS_IDS[_variant] is not None
+        self._count(_path)
+        if _path == "/_mock/stats":
+            return self._send(200,self.SETTINGS.counters)
+        self._delay()
+        if _path == "/" and method == "GET":
+            if _unifios:
+                return self._send(200,'<html><script>window.UNIFI_OS_MANIFEST = {"id":"%s","version":"3.2.9"};</script></html>' % UNIFI_OS_IDS[_variant],content_type="text/html")
+            return self._send(302,b"",headers=[("Location","/manage")])
+        if _path == "/api/login" and method == "POST" and not _unifios:
+            return self._login(False)
+        if _path == "/api/auth/login" and method == "POST" and _unifios:
+            return self._login(True)
+        if self._inject_error():
+            return self._error(self.SETTINGS.error_status,"api.err.Injected")
+        if not self._session_valid():
+            return self._error(401,"api.err.LoginRequired")
+
+        _body = None
+        if method == "POST":
+            _length = int(self.headers.get("Content-Length",0))
+            _body = json.loads(self.rfile.read(_length) or b"null")
+
+        if _variant == "unvr":
+            if _path.startswith("/proxy/protect/api/"):
+                _data = self.ESTATE.protect(_path[len("/proxy/protect/api"):])
+                if _data is not None:
+                    return self._send(200,_data)
+            return self._error(404,"api.err.NotFound")
+
+        _match = re.match(r"^(?:/proxy/network)?/wss/s/([^/]+)/events$",_path)
+        if _match and self.ESTATE.has_site(_match.group(1)) and self.headers.get("Upgrade","").lower() == "websocket":
+            return self._websocket(_match.group(1))
+
+        _prefix = "/proxy/network/api" if _unifios else "/api"
+        if not _path.startswith(_prefix + "/"):
+            return self._error(404,"api.err.NotFound")
+        _path = _path[len(_prefix):]
+        if _path == "/stat/sites" or _path == "/self/sites":
+            return self._send_data(self.ESTATE.sites)
+        _match = re.match(r"^/s/([^/]+)(/.*)$",_path)
+        if not _match or not self.ESTATE.has_site(_match.group(1)):
+            return self._error(400 if _match else 404,"api.err.NoSiteContext" if _match else "api.err.NotFound")
+        _site,_endpoint = _match.groups()
+        if _endpoint == "/stat/sysinfo":
+            return self._send_data([{
+                "timezone" : "Europe/Berlin", "autobackup" : True, "version" : "8.0.26", "previous_version" : "7.5.187",
+                "update_available" : False, "hostname" : "unifi-mock", "name" : f"{UNIFI_OS_IDS[_variant] or 'unifi'}-mock",
+                "uptime" : 1234567, "ubnt_device_type" : UNIFI_OS_IDS[_variant] or "unifi-sw-controller",
+                "udm_version" : "3.2.9" if _unifios else None
+            }])
+        if _endpoint == "/rest/portconf":
+            return self._send_data([{"_id" : "000000000000000000000001", "name" : "All", "forward" : "all"},
+                                    {"_id" : "000000000000000000000002", "name" : "Disabled", "forward" : "disabled"}])
+        if _endpoint == "/stat/device":
+            _macs = (_body or {}).get("macs")
+            if _macs:
+                _macs = set(_macs)
+                return self._send_data([_device for _device in self.ESTATE.devices(_site) if _device["mac"] in _macs])
+            return self._send_data(self.ESTATE.devices_body(_site))
+        if _endpoint == "/stat/device-basic":
+            return self._send_data(self.ESTATE.basic_devices(_site))
+        if _endpoint == "/stat/sta":
+            return self._send_data(self.ESTATE.clients_body(_site))
+        if _endpoint == "/stat/rogueap":
+            return self._send_data(self.ESTATE.rogueap_body(_site))
+        if _endpoint in ("/stat/event","/stat/alarm"):
+            return self._send_data(self.ESTATE.events_body(_site,_body,alarm=_endpoint == "/stat/alarm"))
+        self._error(404,"api.err.NotFound")
+
+def self_signed_certificate(directory):
+    ## certificate for localhost, the agent has to be called with --ignore-cert
+    _cert = os.path.join(directory,"mock_cert.pem")
+    _key = os.path.join(directory,"mock_key.pem")
+    subprocess.run(["openssl","req","-x509","-newkey","rsa:2048","-nodes","-days","1","-subj","/CN=localhost",
+                    "-keyout",_key,"-out",_cert],check=True,stdout=subprocess.DEVNULL,stderr=subprocess.DEVNULL)
+    return _cert,_key
+
+def create_server(args):
+    _estate = unifi_estate(args.sites,args.devices_per_site,args.ssids,seed=args.seed,gateway=not args.no_gateway,clients_per_site=args.clients_per_site,
+                           neighbors_per_site=args.neighbors_per_site,events_per_hour=args.events_per_hour)
+    _handler = type("unifi_mock",(unifi_mock_handler,),{"ESTATE" : _estate, "SETTINGS" : mock_settings(args)})
+    _server = ThreadingHTTPServer((args.bind,args.port),_handler)
+    _server.daemon_threads = True
+    _cert,_key = args.cert,args.key
+    if not _cert:
+        _cert,_key = self_signed_certificate(tempfile.mkdtemp(prefix="unifi_mock_"))
+    _context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    _context.load_cert_chain(_cert,_key)
+    _server.socket = _context.wrap_socket(_server.socket,server_side=True)
+    return _server
+
+def create_argument_parser():
+    parser = argparse.ArgumentParser(description="Local stand-in for the UniFi controller API")
+    parser.add_argument("--bind",default="127.0.0.1")
+    parser.add_argument("--port",type=int,default=8443)
+    parser.add_argument("--variant",choices=sorted(UNIFI_OS_IDS),default="classic",
+                        help="classic controller, UniFi OS console (/proxy/network) or UNVR (/proxy/protect)")
+    parser.add_argument("--sites",type=int,default=10)
+    parser.add_argument("--devices-per-site",dest="devices_per_site",type=int,default=20)
+    parser.add_argument("--ssids",type=int,default=4,help="ssids per access point")
+    parser.add_argument("--clients-per-site",dest="clients_per_site",type=int,default=0,help="wireless clients in /stat/sta, plus 10%% wired")
+    parser.add_argument("--neighbors-per-site",dest="neighbors_per_site",type=int,default=0,help="neighbor bssids in /stat/rogueap")
+    parser.add_argument("--events-per-hour",dest="events_per_hour",type=int,default=0,help="events per site and hour in /stat/event, every 10th is an alarm")
+    parser.add_argument("--websocket-updates",dest="websocket_updates",type=float,default=1,help="device:update messages per second on every /wss/s/SITE/events connection")
+    parser.add_argument("--no-gateway",dest="no_gateway",action="store_true",help="sites without a UDM gateway device")
+    parser.add_argument("--latency",type=float,default=0,help="delay of every response in ms")
+    parser.add_argument("--jitter",type=float,default=0,help="random +/- ms added to the latency")
+    parser.add_argument("--error-rate",dest="error_rate",type=float,default=0,help="share of API requests answered with --error-status")
+    parser.add_argument("--error-status",dest="error_status",type=int,default=500)
+    parser.add_argument("--session-lifetime",dest="session_lifetime",type=float,default=0,help="seconds until a login session expires (401)")
+    parser.add_argument("--username",default="admin")
+    parser.add_argument("--password",default="admin")
+    parser.add_argument("--cert",help="certificate file, default is a new self signed certificate")
+    parser.add_argument("--key",help="key file of --cert")
+    parser.add_argument("--seed",type=int,default=0)
+    return parser
+
+if __name__ == "__main__":
+    args = create_argument_parser().parse_args()
+    _server = create_server(args)
+    sys.stderr.write(f"unifi mock ({args.variant}, {args.sites} sites) on https://{args.bind}:{args.port}\n")
+    sys.stderr.flush()
+    try:
+        _server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -24,8 +24,12 @@
 ##  SOFTWARE.
 
 from cmk.gui.i18n import _
+import json
+import time
 
 from .agent_based_api.v1 import (
+    check_levels,
+    get_value_store,
     Metric,
     register,
     render,
@@ -38,9 +42,9 @@ from .agent_based_api.v1 import (
 )
 
 from .agent_based_api.v1.type_defs import CheckResult, DiscoveryResult
-from typing import Any, Dict, Mapping, Sequence, Optional
+from typing import Any, Dict, Mapping, Sequence, Optional, Tuple
 
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from collections import defaultdict
 from .utils import interfaces
 
@@ -68,6 +72,11 @@ def _safe_int(val,default=0):
     try:
         return int(val)
     except (TypeError,ValueError):
+        pass
+    ## averages like the client signal come as "-53.16", json numbers of --compact are cut by int() above
+    try:
+        return int(float(val))
+    except (TypeError,ValueError,OverflowError):
         return default
 
 def _unifi_status2state(status):
@@ -79,18 +88,63 @@ def _unifi_status2state(status):
 
 from pprint import pprint
 
+def _is_compact(string_table):
+    ## agent option --compact, one json object per line in a sep(0) section
+    return bool(string_table) and len(string_table[0]) == 1 and string_table[0][0].startswith("{")
+
+def _load_compact(string_table):
+    return json.loads("[{0}]".format(",".join(_line[0] for _line in string_table if _line)))
+
 def parse_unifi_dict(string_table):
     _ret = dictobject()
+    if _is_compact(string_table):
+        for _record in _load_compact(string_table):
+            _ret.update(_record)
+        return _ret
     for _line in string_table:
         _ret[_line[0]] = _line[1]
     return _ret
 
 def parse_unifi_nested_dict(string_table):
     _ret = nested_dictobject()
+    if _is_compact(string_table):
+        for _record in _load_compact(string_table):
+            for _key,_values in _record.items():
+                _ret[_key].update(_values)
+        return _ret
     for _line in string_table:
         _ret[_line[0]][_line[1]] = _line[2]
     return _ret
 
+def _safe_int_or_none(val):
+    return None if val in (None,"") else _safe_int(val)
+
+def _safe_float_or_none(val):
+    return None if val in (None,"") else _safe_float(val)
+
+## converters for the field types of the parsed records and the type a value may already have,
+## the json values of --compact are mostly of the right type and passed through
+UNIFI_TYPE_CONVERTERS = {
+    str             : (str,str),
+    int             : (int,_safe_int),
+    float           : (float,_safe_float),
+    Optional[int]   : (int,_safe_int_or_none),
+    Optional[float] : (float,_safe_float_or_none),
+}
+_RECORD_FIELDS = {}
+
+def _typed_record(cls,data):
+    ## convert the agent values once, fields missing in the section keep their default
+    _fields = _RECORD_FIELDS.get(cls)
+    if _fields is None:
+        _fields = _RECORD_FIELDS[cls] = [(_field.name,) + UNIFI_TYPE_CONVERTERS[_field.type] for _field in fields(cls)]
+    _values = {}
+    for _name,_type,_convert in _fields:
+        if _name in data:
+            _value = data[_name]
+            _values[_name] = _value if type(_value) is _type else _convert(_value)
+    return cls(**_values)
+
 UNIFI_DEVICE_STATES = {
     "0" : "disconnected",
     "1" : "connected",
@@ -99,18 +153,36 @@ UNIFI_DEVICE_STATES = {
 
 
 ############ Controller ############
+@dataclass
+class unifi_controller_section:
+    controller_version          : str = ""
+    update_available            : int = 0
+    cloudkey_version            : str = ""
+    cloudkey_update_available   : int = 0
+    error                       : str = ""
+
+def parse_unifi_controller(string_table) -> unifi_controller_section:
+    return _typed_record(unifi_controller_section,parse_unifi_dict(string_table))
+
 def discovery_unifi_controller(section):
     yield Service(item="Unifi Controller")
     if section.cloudkey_version:
         yield Service(item="Cloudkey")
 
 def check_unifi_controller(item,section):
+    if section.error:
+        ## written by the agent for a --controller it could not poll
+        yield Result(
+            state=State.CRIT,
+            summary=f"Agent error: {section.error}"
+        )
+        return
     if item == "Unifi Controller":
         yield Result(
             state=State.OK,
             summary=f"Version: {section.controller_version}"
         )
-        if int(section.update_available) > 0:
+        if section.update_available > 0:
             yield Result(
                 state=State.WARN,
                 notice=_("Update available")
@@ -120,7 +192,7 @@ def check_unifi_controller(item,section):
             state=State.OK,
             summary=f"Version: {section.cloudkey_version}"
         )
-        if _safe_int(section.cloudkey_update_available) > 0:
+        if section.cloudkey_update_available > 0:
             yield Result(
                 state=State.WARN,
                 notice=_("Update available")
@@ -130,13 +202,13 @@ def inventory_unifi_controller(section):
     yield Attributes(
         path=["software","os"],
         inventory_attributes={
-            "controller_version" : section.get("controller_version")
+            "controller_version" : section.controller_version or None
         }
     )
 
 register.agent_section(
     name = 'unifi_controller',
-    parse_function = parse_unifi_dict
+    parse_function = parse_unifi_controller
 )
 
 register.check_plugin(
@@ -152,24 +224,57 @@ register.inventory_plugin(
 )
 
 ############ SITES ###########
+@dataclass
+class unifi_site_record:
+    desc                : str = ""
+    satisfaction        : int = 0
+    num_new_alarms      : int = 0
+    lan_status          : str = ""
+    lan_num_user        : int = 0
+    lan_num_guest       : int = 0
+    lan_rx_bytes_r      : int = 0
+    lan_tx_bytes_r      : int = 0
+    lan_num_sw          : int = 0
+    lan_num_adopted     : int = 0
+    wlan_status         : str = ""
+    wlan_num_user       : int = 0
+    wlan_num_guest      : int = 0
+    wlan_num_iot        : int = 0
+    wlan_rx_bytes_r     : int = 0
+    wlan_tx_bytes_r     : int = 0
+    wlan_num_ap         : int = 0
+    wlan_num_adopted    : int = 0
+    wan_status          : str = ""
+    www_status          : str = ""
+    vpn_status          : str = ""
+
+def parse_unifi_sites(string_table) -> Dict[str, unifi_site_record]:
+    ## the services are named by the site description
+    _ret = {}
+    for _site in parse_unifi_nested_dict(string_table).values():
+        _record = _typed_record(unifi_site_record,_site)
+        _ret.setdefault(_record.desc,_record)
+    return _ret
 
 def discovery_unifi_sites(section):
-    for _item in section.values():
-        yield Service(item=f"{_item.desc}")
+    for _item in section:
+        yield Service(item=_item)
 
 def check_unifi_sites(item,params,section):
-    site = next(filter(lambda x: x.desc == item,section.values()))
-    yield Metric("satisfaction",max(0,_safe_int(site.satisfaction)))
+    site = section.get(item)
+    if not site:
+        return
+    yield Metric("satisfaction",max(0,site.satisfaction))
 
     if site.lan_status != "unknown":
-        yield Metric("lan_user_sta",_safe_int(site.lan_num_user))
-        yield Metric("lan_guest_sta",_safe_int(site.lan_num_guest))
-        yield Metric("if_in_octets",_safe_int(site.lan_rx_bytes_r))
-        #yield Metric("if_in_bps",_safe_int(site.lan_rx_bytes_r)*8)
-        yield Metric("if_out_octets",_safe_int(site.lan_tx_bytes_r))
-        #yield Metric("if_out_bps",_safe_int(site.lan_tx_bytes_r)*8)
-        yield Metric("lan_active_sw",_safe_int(site.lan_num_sw))
-        yield Metric("lan_total_sw",_safe_int(site.lan_num_adopted))
+        yield Metric("lan_user_sta",site.lan_num_user)
+        yield Metric("lan_guest_sta",site.lan_num_guest)
+        yield Metric("if_in_octets",site.lan_rx_bytes_r)
+        #yield Metric("if_in_bps",site.lan_rx_bytes_r*8)
+        yield Metric("if_out_octets",site.lan_tx_bytes_r)
+        #yield Metric("if_out_bps",site.lan_tx_bytes_r*8)
+        yield Metric("lan_active_sw",site.lan_num_sw)
+        yield Metric("lan_total_sw",site.lan_num_adopted)
         yield Result(
             state=_unifi_status2state(site.lan_status),
             summary=f"LAN: {site.lan_num_sw}/{site.lan_num_adopted} Switch ({site.lan_status})"
@@ -180,13 +285,13 @@ def check_unifi_sites(item,params,section):
         #)
 
     if site.wlan_status != "unknown":
-        yield Metric("wlan_user_sta",_safe_int(site.wlan_num_user))
-        yield Metric("wlan_guest_sta",_safe_int(site.wlan_num_guest))
-        yield Metric("wlan_iot_sta",_safe_int(site.wlan_num_iot))
-        yield Metric("wlan_if_in_octets",_safe_int(site.wlan_rx_bytes_r))
-        yield Metric("wlan_if_out_octets",_safe_int(site.wlan_tx_bytes_r))
-        yield Metric("wlan_active_ap",_safe_int(site.wlan_num_ap))
-        yield Metric("wlan_total_ap",_safe_int(site.wlan_num_adopted))
+        yield Metric("wlan_user_sta",site.wlan_num_user)
+        yield Metric("wlan_guest_sta",site.wlan_num_guest)
+        yield Metric("wlan_iot_sta",site.wlan_num_iot)
+        yield Metric("wlan_if_in_octets",site.wlan_rx_bytes_r)
+        yield Metric("wlan_if_out_octets",site.wlan_tx_bytes_r)
+        yield Metric("wlan_active_ap",site.wlan_num_ap)
+        yield Metric("wlan_total_ap",site.wlan_num_adopted)
         yield Result(
             state=_unifi_status2state(site.wlan_status),
             summary=f"WLAN: {site.wlan_num_ap}/{site.wlan_num_adopted} AP ({site.wlan_status})"
@@ -224,7 +329,7 @@ def check_unifi_sites(item,params,section):
 
 register.agent_section(
     name = 'unifi_sites',
-    parse_function = parse_unifi_nested_dict
+    parse_function = parse_unifi_sites
 )
 
 register.check_plugin(
@@ -245,7 +350,7 @@ def inventory_unifi_device_shortlist(section):
             key_columns={"_name"   : _name},
             inventory_columns={
                 "serial"     : _device.get("serial"),
-                "_state"     : UNIFI_DEVICE_STATES.get(_device.state,"unknown"),
+                "_state"     : UNIFI_DEVICE_STATES.get(str(_device.state),"unknown"),
                 "vendor"    : "ubiquiti",
                 "model"     : _device.get("model_name",_device.get("model")),
                 "version"   : _device.version,
@@ -266,14 +371,95 @@ register.inventory_plugin(
 
 
 
+############ TOPOLOGY ##########
+@dataclass
+class unifi_topology_record:
+    mac             : str = ""
+    state           : str = ""
+    uplink_device   : str = ""
+    depth           : int = 0
+    downstream      : int = 0
+    path            : str = ""
+
+def parse_unifi_topology(string_table) -> Dict[str, unifi_topology_record]:
+    return {
+        _name: _typed_record(unifi_topology_record,_data)
+        for _name,_data in parse_unifi_nested_dict(string_table).items()
+    }
+
+def discovery_unifi_topology(section):
+    if section:
+        yield Service()
+
+def check_unifi_topology(section):
+    _maxdepth = max((_device.depth for _device in section.values()),default=0)
+    yield Result(
+        state=State.OK,
+        summary=f"{len(section)} Devices, max Depth {_maxdepth}"
+    )
+    ## pending adoption, upgrading or provisioning devices are still connected
+    _down = set(_name for _name,_device in section.items() if _device.state == "0")
+    for _name in sorted(_down):
+        _device = section[_name]
+        ## only report the device nearest to the gateway, everything behind it is a consequence
+        if any(_parent in _down for _parent in _device.path.split(",") if _parent):
+            continue
+        yield Result(
+            state=State.WARN,
+            notice=f"{_name} {UNIFI_DEVICE_STATES.get(_device.state,'unknown')} ({_device.downstream} Devices behind)"
+        )
+    yield Metric("unifi_topology_depth",_maxdepth)
+
+register.agent_section(
+    name = 'unifi_topology',
+    parse_function = parse_unifi_topology
+)
+
+register.check_plugin(
+    name='unifi_topology',
+    service_name='Unifi Topology',
+    discovery_function=discovery_unifi_topology,
+    check_function=check_unifi_topology,
+)
+
 ############ DEVICE ###########
+@dataclass
+class unifi_device_section:
+    name                : str = ""
+    mac                 : str = ""
+    model               : str = ""
+    board_rev           : str = ""
+    serial              : str = ""
+    snmp_contact        : str = ""
+    snmp_location       : str = ""
+    type                : str = ""
+    state               : str = ""
+    version             : str = ""
+    upgradable          : int = 0
+    user_num_sta        : int = 0
+    guest_num_sta       : int = 0
+    satisfaction        : int = 0
+    general_temperature : Optional[float] = None
+    fan_level           : Optional[int] = None
+    uplink_device       : str = ""
+    uplink_up           : int = 0
+    uplink_remote_port  : str = ""
+    speedtest_status    : str = ""
+    speedtest_time      : float = 0
+    speedtest_ping      : float = 0
+    speedtest_download  : float = 0
+    speedtest_upload    : float = 0
+
+def parse_unifi_device(string_table) -> unifi_device_section:
+    return _typed_record(unifi_device_section,parse_unifi_dict(string_table))
+
 def discovery_unifi_device(section):
     yield Service(item="Device Status")
     yield Service(item="Unifi Device")
     yield Service(item="Active-User")
     if  section.type != "uap":  # kein satisfaction bei ap .. radio/ssid haben schon
         yield Service(item="Satisfaction")
-    if section.general_temperature:
+    if section.general_temperature is not None:
         yield Service(item="Temperature")
     if section.uplink_device:
         yield Service(item="Uplink")
@@ -297,37 +483,37 @@ def check_unifi_device(item,section):
             state=State.OK,
             summary=f"Version: {section.version}"
         )
-        if _safe_int(section.upgradable) > 0:
+        if section.upgradable > 0:
             yield Result(
                 state=State.WARN,
                 notice=_("Update available")
             )
     if item == "Active-User":
-        _active_user = _safe_int(section.user_num_sta)
+        _active_user = section.user_num_sta
         yield Result(
             state=State.OK,
             summary=f"{_active_user}"
         )
-        if _safe_int(section.guest_num_sta) > -1:
+        if section.guest_num_sta > -1:
             yield Result(
                 state=State.OK,
                 summary=f"Guest: {section.guest_num_sta}"
             )
         yield Metric("user_sta",_active_user)
-        yield Metric("guest_sta",_safe_int(section.guest_num_sta))
+        yield Metric("guest_sta",section.guest_num_sta)
     if item == "Satisfaction":
         yield Result(
             state=State.OK,
             summary=f"{section.satisfaction}%"
         )
-        yield Metric("satisfaction",max(0,_safe_int(section.satisfaction)))
+        yield Metric("satisfaction",max(0,section.satisfaction))
     if item == "Temperature":
-        yield Metric("temp",_safe_float(section.general_temperature))
+        yield Metric("temp",section.general_temperature)
         yield Result(
             state=State.OK,
             summary=f"{section.general_temperature} °C"
         )
-        if section.fan_level:
+        if section.fan_level is not None:
             yield Result(
                 state=State.OK,
                 summary=f"Fan: {section.fan_level}%"
@@ -345,14 +531,14 @@ def check_unifi_device(item,section):
             state=State.OK,
             summary=f"Up: {section.speedtest_upload} Mbit/s"
         )
-        _speedtest_time = render.datetime(_safe_float(section.speedtest_time))
+        _speedtest_time = render.datetime(section.speedtest_time)
         yield Result(
             state=State.OK,
             summary=f"Last: {_speedtest_time}"
         )
-        yield Metric("rtt",_safe_float(section.speedtest_ping))
-        yield Metric("if_in_bps",_safe_float(section.speedtest_download)*1024*1024) ## mbit to bit
-        yield Metric("if_out_bps",_safe_float(section.speedtest_upload)*1024*1024) ## mbit to bit
+        yield Metric("rtt",section.speedtest_ping)
+        yield Metric("if_in_bps",section.speedtest_download*1024*1024) ## mbit to bit
+        yield Metric("if_out_bps",section.speedtest_upload*1024*1024) ## mbit to bit
             
     if item == "Uplink":
         yield Result(
@@ -364,22 +550,22 @@ def inventory_unifi_device(section):
     yield Attributes(
         path=["software","os"],
         inventory_attributes={
-            "version"   : section.get("version")
+            "version"   : section.version or None
         }
     )
     yield Attributes(
         path=["software","configuration","snmp_info"],
         inventory_attributes = {
-            "name"      : section.get("name"),
-            "contact"   : section.get("snmp_contact"),
-            "location"  : section.get("snmp_location")
+            "name"      : section.name or None,
+            "contact"   : section.snmp_contact or None,
+            "location"  : section.snmp_location or None
         }
     )
     _hwdict = {
         "vendor"    : "ubiquiti",
     }
     for _key in ("model","board_rev","serial","mac"):
-        _val = section.get(_key)
+        _val = getattr(section,_key)
         if _val:
             _hwdict[_key] = _val
     yield Attributes(
@@ -389,7 +575,7 @@ def inventory_unifi_device(section):
 
 register.agent_section(
     name = 'unifi_device',
-    parse_function = parse_unifi_dict
+    parse_function = parse_unifi_device
 )
 
 register.check_plugin(
@@ -422,7 +608,19 @@ class unifi_interface(interfaces.InterfaceWithCounters):
     portconf        : Optional[str] = None
 
 
-def _convert_unifi_counters_if(section: Section) -> interfaces.Section:
+@dataclass
+class unifi_network_ports_section:
+    interfaces  : interfaces.Section
+    by_index    : Dict[int, Tuple[int, unifi_interface]]
+    by_alias    : Dict[str, Tuple[int, unifi_interface]]
+    ports       : Dict[str, dictobject]
+
+    def get(self, item: str) -> Optional[unifi_interface]:
+        ## the first port in section order matching the index or the alias, like the former next(filter(...))
+        _matches = [_match for _match in (self.by_index.get(_safe_int(item,-1)),self.by_alias.get(item)) if _match]
+        return min(_matches,key=lambda x: x[0])[1] if _matches else None
+
+def _convert_unifi_counters_if(netif: dictobject) -> unifi_interface:
     ##  10|port_idx|10
     ##  10|port_poe|1
     ##  10|poe_caps|7
@@ -475,79 +673,90 @@ def _convert_unifi_counters_if(section: Section) -> interfaces.Section:
     ##      poe_enable=False, poe_mode='auto', poe_good=None, poe_current=0.0, poe_power=0.0, poe_voltage=0.0, poe_class='Unknown', 
     ##      dot1x_mode='unknown',dot1x_status='disabled', ip_address='', portconf='ALL')
 
-    return [ 
-        unifi_interface(
-            attributes=interfaces.Attributes(
-                index=str(netif.port_idx),
-                descr=netif.name,
-                alias=netif.name,
-                type='6',
-                speed=_safe_int(netif.speed)*1000000,
-                oper_status=netif.oper_status,
-                admin_status=netif.admin_status,
-            ),
-            counters=interfaces.Counters(
-                in_octets=_safe_int(netif.rx_bytes),
-                in_ucast=_safe_int(netif.rx_packets),
-                in_mcast=_safe_int(netif.rx_multicast),
-                in_bcast=_safe_int(netif.rx_broadcast),
-                in_disc=_safe_int(netif.rx_dropped),
-                in_err=_safe_int(netif.rx_errors),
-                out_octets=_safe_int(netif.tx_bytes),
-                out_ucast=_safe_int(netif.tx_packets),
-                out_mcast=_safe_int(netif.tx_multicast),
-                out_bcast=_safe_int(netif.tx_broadcast),
-                out_disc=_safe_int(netif.tx_dropped),
-                out_err=_safe_int(netif.tx_errors),
-            ),
-            jumbo=True if netif.jumbo == "1" else False,
-            satisfaction=_safe_int(netif.satisfaction) if netif.satisfaction and netif.oper_status == "1" else 0,
-            poe_enable=True if netif.poe_enable == "1" else False,
-            poe_mode=netif.poe_mode,
-            poe_current=float(netif.poe_current) if netif.poe_current else 0,
-            poe_voltage=float(netif.poe_voltage) if netif.poe_voltage else 0,
-            poe_power=float(netif.poe_power) if netif.poe_power else 0,
-            poe_class=netif.poe_class,
-            dot1x_mode=netif.dot1x_mode,
-            dot1x_status=netif.dot1x_status,
-            ip_address=netif.ip,
-            portconf=netif.portconf
-        ) for netif in parse_unifi_nested_dict(section).values()
-    ]
-    
+    ## the json values of --compact are numbers, the key|value format has strings
+    _oper_status = str(netif.oper_status)
+    return unifi_interface(
+        attributes=interfaces.Attributes(
+            index=str(netif.port_idx),
+            descr=netif.name,
+            alias=netif.name,
+            type='6',
+            speed=_safe_int(netif.speed)*1000000,
+            oper_status=_oper_status,
+            admin_status=str(netif.admin_status),
+        ),
+        counters=interfaces.Counters(
+            in_octets=_safe_int(netif.rx_bytes),
+            in_ucast=_safe_int(netif.rx_packets),
+            in_mcast=_safe_int(netif.rx_multicast),
+            in_bcast=_safe_int(netif.rx_broadcast),
+            in_disc=_safe_int(netif.rx_dropped),
+            in_err=_safe_int(netif.rx_errors),
+            out_octets=_safe_int(netif.tx_bytes),
+            out_ucast=_safe_int(netif.tx_packets),
+            out_mcast=_safe_int(netif.tx_multicast),
+            out_bcast=_safe_int(netif.tx_broadcast),
+            out_disc=_safe_int(netif.tx_dropped),
+            out_err=_safe_int(netif.tx_errors),
+        ),
+        jumbo=True if str(netif.jumbo) == "1" else False,
+        satisfaction=_safe_int(netif.satisfaction) if netif.satisfaction and _oper_status == "1" else 0,
+        poe_enable=True if str(netif.poe_enable) == "1" else False,
+        poe_mode=netif.poe_mode,
+        poe_current=float(netif.poe_current) if netif.poe_current else 0,
+        poe_voltage=float(netif.poe_voltage) if netif.poe_voltage else 0,
+        poe_power=float(netif.poe_power) if netif.poe_power else 0,
+        poe_class=netif.poe_class,
+        dot1x_mode=netif.dot1x_mode,
+        dot1x_status=netif.dot1x_status,
+        ip_address=netif.ip,
+        portconf=netif.portconf
+    )
 
+def parse_unifi_network_ports(string_table) -> unifi_network_ports_section:
+    ## parsed once per cycle, discovery check and inventory share the result
+    _ports = parse_unifi_nested_dict(string_table)
+    _interfaces = [_convert_unifi_counters_if(_netif) for _netif in _ports.values()]
+    _by_index = {}
+    _by_alias = {}
+    for _position,_iface in enumerate(_interfaces):
+        _by_index.setdefault(_safe_int(_iface.attributes.index),(_position,_iface))
+        _by_alias.setdefault(_iface.attributes.alias,(_position,_iface))
+    return unifi_network_ports_section(
+        interfaces=_interfaces,
+        by_index=_by_index,
+        by_alias=_by_alias,
+        ports=_ports
+    )
 
-def discovery_unifi_network_port_if(  ## fixme parsed_section_name
+def discovery_unifi_network_port_if(
     params: Sequence[Mapping[str, Any]],
-    section: Section,
+    section: unifi_network_ports_section,
 ) -> DiscoveryResult:
     yield from interfaces.discover_interfaces(
         params,
-        _convert_unifi_counters_if(section),
+        section.interfaces,
     )
 
 
-def check_unifi_network_port_if(  ##fixme parsed_section_name 
+def check_unifi_network_port_if(
     item: str,
     params: Mapping[str, Any],
-    section: Section,
+    section: unifi_network_ports_section,
 ) -> CheckResult:
-    _converted_ifs = _convert_unifi_counters_if(section)
-    iface = next(filter(lambda x: _safe_int(item,-1) == _safe_int(x.attributes.index) or item == x.attributes.alias,_converted_ifs),None) ## fix Service Discovery appearance alias/descr
+    iface = section.get(item) ## fix Service Discovery appearance alias/descr
     yield from interfaces.check_multiple_interfaces(
         item,
         params,
-        _converted_ifs,
+        section.interfaces,
     )
     if iface:
-        #pprint(iface)
         if iface.portconf:
             yield Result(
                 state=State.OK,
                 summary=f"Network: {iface.portconf}"
             )
         yield Metric("satisfaction",max(0,iface.satisfaction))
-        #pprint(iface)
         if iface.poe_enable:
             yield Result(
                 state=State.OK,
@@ -562,12 +771,13 @@ def check_unifi_network_port_if(  ##fixme parsed_section_name
                 summary=f"IP: {iface.ip_address}"
             )
 
-def inventory_unifi_network_ports(section):
+def inventory_unifi_network_ports(section: unifi_network_ports_section):
     _total_ethernet_ports = 0
     _available_ethernet_ports = 0
-    for _iface in parse_unifi_nested_dict(section).values():
+    for _iface in section.ports.values():
         _total_ethernet_ports +=1
-        _available_ethernet_ports +=1 if _iface.oper_status == '2' else 0
+        _available = str(_iface.oper_status) == '2'
+        _available_ethernet_ports +=1 if _available else 0
         yield TableRow(
             path=["networking","interfaces"],
             key_columns={"index"    : _safe_int(_iface.port_idx)},
@@ -577,7 +787,7 @@ def inventory_unifi_network_ports(section):
                 "speed"         : _safe_int(_iface.speed)*1000000,
                 "oper_status"   : _safe_int(_iface.oper_status),
                 "admin_status"  : _safe_int(_iface.admin_status),
-                "available"     : _iface.oper_status == '2',
+                "available"     : _available,
                 "vlans"         : _iface.portconf,
                 "port_type"     : 6,
             }
@@ -592,6 +802,11 @@ def inventory_unifi_network_ports(section):
         }
     )
 
+register.agent_section(
+    name = 'unifi_network_ports',
+    parse_function = parse_unifi_network_ports
+)
+
 register.check_plugin(
     name='unifi_network_ports_if',
     sections=["unifi_network_ports"],
@@ -611,23 +826,46 @@ register.inventory_plugin(
 )
 
 ############ DEVICERADIO ###########
+@dataclass
+class unifi_radio_record:
+    radio           : str = ""
+    channel         : str = ""
+    rx_bytes        : int = 0
+    tx_bytes        : int = 0
+    satisfaction    : int = 0
+    num_sta         : int = 0
+    user_num_sta    : int = 0
+    guest_num_sta   : int = 0
+    iot_num_sta     : int = 0
+
+UNIFI_RADIO_ITEMS = {
+    "ng"    : "2.4Ghz",
+    "na"    : "5Ghz"
+}
+
+def parse_unifi_radios(string_table) -> Dict[str, unifi_radio_record]:
+    ## keyed by the service item, the first radio of a band is used
+    _ret = {}
+    for _radio in parse_unifi_nested_dict(string_table).values():
+        _item = UNIFI_RADIO_ITEMS.get(_radio.radio)
+        if _item and _item not in _ret:
+            _ret[_item] = _typed_record(unifi_radio_record,_radio)
+    return _ret
+
 def discovery_unifi_radios(section):
-    #pprint(section)
-    for _radio in section.values():
-        if _radio.radio == "ng":
-            yield Service(item="2.4Ghz")
-        if _radio.radio == "na":
-            yield Service(item="5Ghz")
+    for _item in section:
+        yield Service(item=_item)
 
 def check_unifi_radios(item,section):
-    _item = { "2.4Ghz" : "ng", "5Ghz" : "na" }.get(item)
-    radio = next(filter(lambda x: x.radio == _item,section.values()))
-    yield Metric("read_data",_safe_int(radio.rx_bytes))
-    yield Metric("write_data",_safe_int(radio.tx_bytes))
-    yield Metric("satisfaction",max(0,_safe_int(radio.satisfaction)))
-    yield Metric("wlan_user_sta",_safe_int(radio.user_num_sta))
-    yield Metric("wlan_guest_sta",_safe_int(radio.guest_num_sta))
-    yield Metric("wlan_iot_sta",_safe_int(radio.iot_num_sta))
+    radio = section.get(item)
+    if not radio:
+        return
+    yield Metric("read_data",radio.rx_bytes)
+    yield Metric("write_data",radio.tx_bytes)
+    yield Metric("satisfaction",max(0,radio.satisfaction))
+    yield Metric("wlan_user_sta",radio.user_num_sta)
+    yield Metric("wlan_guest_sta",radio.guest_num_sta)
+    yield Metric("wlan_iot_sta",radio.iot_num_sta)
 
     yield Result(
         state=State.OK,
@@ -648,7 +886,7 @@ def check_unifi_radios(item,section):
 
 register.agent_section(
     name = 'unifi_network_radios',
-    parse_function = parse_unifi_nested_dict
+    parse_function = parse_unifi_radios
 )
 
 register.check_plugin(
@@ -660,6 +898,31 @@ register.check_plugin(
 
 
 ############ SSIDs ###########
+@dataclass
+class unifi_ssid_record:
+    ng_channel              : int = 0
+    na_channel              : int = 0
+    ng_is_guest             : int = 0
+    na_is_guest             : int = 0
+    ng_satisfaction         : int = 0
+    na_satisfaction         : int = 0
+    ng_num_sta              : int = 0
+    na_num_sta              : int = 0
+    ng_avg_client_signal    : int = 0
+    na_avg_client_signal    : int = 0
+    ng_tcp_packet_loss      : int = 0
+    na_tcp_packet_loss      : int = 0
+    ng_wifi_retries         : int = 0
+    na_wifi_retries         : int = 0
+    ng_wifi_latency         : int = 0
+    na_wifi_latency         : int = 0
+
+def parse_unifi_ssids(string_table) -> Dict[str, unifi_ssid_record]:
+    return {
+        _ssid: _typed_record(unifi_ssid_record,_data)
+        for _ssid,_data in parse_unifi_nested_dict(string_table).items()
+    }
+
 def discovery_unifi_ssids(section):
     for _ssid in section:
         yield Service(item=_ssid)
@@ -667,47 +930,47 @@ def discovery_unifi_ssids(section):
 def check_unifi_ssids(item,section):
     ssid = section.get(item)
     if ssid:
-        _channels = ",".join(list(filter(lambda x: _safe_int(x) > 0,[ssid.ng_channel,ssid.na_channel])))
+        _channels = ",".join(str(_channel) for _channel in (ssid.ng_channel,ssid.na_channel) if _channel > 0)
         yield Result(
             state=State.OK,
             summary=f"Channels: {_channels}"
         )
-        if (_safe_int(ssid.ng_is_guest) + _safe_int(ssid.na_is_guest)) > 0:
+        if (ssid.ng_is_guest + ssid.na_is_guest) > 0:
             yield Result(
                 state=State.OK,
                 summary="Guest"
             )
-        _satisfaction = max(0,min(_safe_int(ssid.ng_satisfaction),_safe_int(ssid.na_satisfaction)))
+        _satisfaction = max(0,min(ssid.ng_satisfaction,ssid.na_satisfaction))
         yield Result(
             state=State.OK,
             summary=f"Satisfaction: {_satisfaction}"
         )
-        _num_sta = _safe_int(ssid.na_num_sta) + _safe_int(ssid.ng_num_sta)
+        _num_sta = ssid.na_num_sta + ssid.ng_num_sta
         if _num_sta > 0:
             yield Result(
                 state=State.OK,
                 summary=f"User: {_num_sta}"
             )
         yield Metric("satisfaction",max(0,_satisfaction))
-        yield Metric("wlan_24Ghz_num_user",_safe_int(ssid.ng_num_sta) )
-        yield Metric("wlan_5Ghz_num_user",_safe_int(ssid.na_num_sta) )
+        yield Metric("wlan_24Ghz_num_user",ssid.ng_num_sta)
+        yield Metric("wlan_5Ghz_num_user",ssid.na_num_sta)
     
-        yield Metric("na_avg_client_signal",_safe_int(ssid.na_avg_client_signal))
-        yield Metric("ng_avg_client_signal",_safe_int(ssid.ng_avg_client_signal))
+        yield Metric("na_avg_client_signal",ssid.na_avg_client_signal)
+        yield Metric("ng_avg_client_signal",ssid.ng_avg_client_signal)
         
-        yield Metric("na_tcp_packet_loss",_safe_int(ssid.na_tcp_packet_loss))
-        yield Metric("ng_tcp_packet_loss",_safe_int(ssid.ng_tcp_packet_loss))
+        yield Metric("na_tcp_packet_loss",ssid.na_tcp_packet_loss)
+        yield Metric("ng_tcp_packet_loss",ssid.ng_tcp_packet_loss)
     
-        yield Metric("na_wifi_retries",_safe_int(ssid.na_wifi_retries))
-        yield Metric("ng_wifi_retries",_safe_int(ssid.ng_wifi_retries))
-        yield Metric("na_wifi_latency",_safe_int(ssid.na_wifi_latency))
-        yield Metric("ng_wifi_latency",_safe_int(ssid.ng_wifi_latency))
+        yield Metric("na_wifi_retries",ssid.na_wifi_retries)
+        yield Metric("ng_wifi_retries",ssid.ng_wifi_retries)
+        yield Metric("na_wifi_latency",ssid.na_wifi_latency)
+        yield Metric("ng_wifi_latency",ssid.ng_wifi_latency)
     
     
 
 register.agent_section(
     name = 'unifi_network_ssids',
-    parse_function = parse_unifi_nested_dict
+    parse_function = parse_unifi_ssids
 )
 
 register.check_plugin(
@@ -719,8 +982,28 @@ register.check_plugin(
 
 
 ############ SSIDsListController ###########
+@dataclass
+class unifi_ssidlist_record:
+    channels                : str = ""
+    num_sta                 : int = 0
+    ng_num_sta              : int = 0
+    na_num_sta              : int = 0
+    ng_avg_client_signal    : int = 0
+    na_avg_client_signal    : int = 0
+    ng_tcp_packet_loss      : int = 0
+    na_tcp_packet_loss      : int = 0
+    ng_wifi_retries         : int = 0
+    na_wifi_retries         : int = 0
+    ng_wifi_latency         : int = 0
+    na_wifi_latency         : int = 0
+
+def parse_unifi_ssidlist(string_table) -> Dict[str, unifi_ssidlist_record]:
+    return {
+        _ssid: _typed_record(unifi_ssidlist_record,_data)
+        for _ssid,_data in parse_unifi_nested_dict(string_table).items()
+    }
+
 def discovery_unifi_ssidlist(section):
-    #pprint(section)
     for _ssid in section:
         yield Service(item=_ssid)
 
@@ -735,22 +1018,22 @@ def check_unifi_ssidlist(item,section):
             state=State.OK,
             summary=f"User: {ssid.num_sta}"
         )
-        yield Metric("wlan_24Ghz_num_user",_safe_int(ssid.ng_num_sta) )
-        yield Metric("wlan_5Ghz_num_user",_safe_int(ssid.na_num_sta) )
-        yield Metric("na_avg_client_signal",_safe_int(ssid.na_avg_client_signal))
-        yield Metric("ng_avg_client_signal",_safe_int(ssid.ng_avg_client_signal))
+        yield Metric("wlan_24Ghz_num_user",ssid.ng_num_sta)
+        yield Metric("wlan_5Ghz_num_user",ssid.na_num_sta)
+        yield Metric("na_avg_client_signal",ssid.na_avg_client_signal)
+        yield Metric("ng_avg_client_signal",ssid.ng_avg_client_signal)
         
-        yield Metric("na_tcp_packet_loss",_safe_int(ssid.na_tcp_packet_loss))
-        yield Metric("ng_tcp_packet_loss",_safe_int(ssid.ng_tcp_packet_loss))
+        yield Metric("na_tcp_packet_loss",ssid.na_tcp_packet_loss)
+        yield Metric("ng_tcp_packet_loss",ssid.ng_tcp_packet_loss)
     
-        yield Metric("na_wifi_retries",_safe_int(ssid.na_wifi_retries))
-        yield Metric("ng_wifi_retries",_safe_int(ssid.ng_wifi_retries))
-        yield Metric("na_wifi_latency",_safe_int(ssid.na_wifi_latency))
-        yield Metric("ng_wifi_latency",_safe_int(ssid.ng_wifi_latency))
+        yield Metric("na_wifi_retries",ssid.na_wifi_retries)
+        yield Metric("ng_wifi_retries",ssid.ng_wifi_retries)
+        yield Metric("na_wifi_latency",ssid.na_wifi_latency)
+        yield Metric("ng_wifi_latency",ssid.ng_wifi_latency)
 
 register.agent_section(
     name = 'unifi_ssid_list',
-    parse_function = parse_unifi_nested_dict
+    parse_function = parse_unifi_ssidlist
 )
 
 register.check_plugin(
@@ -761,3 +1044,782 @@ register.check_plugin(
 )
 
 
+
+
+############ Clients ###########
+## upper edges of the histogram buckets written by the agent, the last bucket takes everything above
+UNIFI_SIGNAL_BUCKETS = (-90,-80,-70,-60,-50)
+UNIFI_RATE_BUCKETS = (24,54,150,300,600,1200)
+
+@dataclass
+class unifi_clients_record:
+    num_clients         : int = 0
+    num_guest           : int = 0
+    poor_satisfaction   : int = 0
+    satisfaction_p10    : Optional[int] = None
+    satisfaction_p50    : Optional[int] = None
+    signal_p10          : Optional[int] = None
+    signal_p50          : Optional[int] = None
+    signal_p90          : Optional[int] = None
+    signal_hist         : str = ""
+    tx_rate_p10         : Optional[int] = None
+    tx_rate_p50         : Optional[int] = None
+    tx_rate_p90         : Optional[int] = None
+    tx_rate_hist        : str = ""
+    rx_rate_p10         : Optional[int] = None
+    rx_rate_p50         : Optional[int] = None
+    rx_rate_p90         : Optional[int] = None
+    rx_rate_hist        : str = ""
+
+@dataclass
+class unifi_site_clients_record(unifi_clients_record):
+    desc                : str = ""
+    num_wired           : int = 0
+    num_wireless        : int = 0
+    num_clients_ng      : int = 0
+    num_clients_na      : int = 0
+    num_clients_6e      : int = 0
+
+def parse_unifi_clients(string_table) -> Dict[str, unifi_clients_record]:
+    ## per ssid and band of an access point, e.g. "Office 5Ghz"
+    return {
+        _item: _typed_record(unifi_clients_record,_data)
+        for _item,_data in parse_unifi_nested_dict(string_table).items()
+    }
+
+def parse_unifi_site_clients(string_table) -> Dict[str, unifi_site_clients_record]:
+    ## keyed by the site description like the site services
+    _ret = {}
+    for _site in parse_unifi_nested_dict(string_table).values():
+        _record = _typed_record(unifi_site_clients_record,_site)
+        _ret.setdefault(_record.desc,_record)
+    return _ret
+
+def _render_histogram(histogram,buckets,unit):
+    _counts = histogram.split(",")
+    if len(_counts) != len(buckets) + 1:
+        return ""
+    _labels = [f"<={buckets[0]}"] + [f"{_low + 1}..{_high}" for _low,_high in zip(buckets,buckets[1:])] + [f">{buckets[-1]}"]
+    return ", ".join(f"{_label} {unit}: {_count}" for _label,_count in zip(_labels,_counts))
+
+def _check_unifi_clients(params,clients):
+    yield Result(
+        state=State.OK,
+        summary=f"Clients: {clients.num_clients} ({clients.num_guest} Guests)"
+    )
+    yield Metric("unifi_clients",clients.num_clients)
+    yield Metric("unifi_guest_clients",clients.num_guest)
+    if clients.signal_p10 is not None:
+        yield from check_levels(
+            clients.signal_p10,
+            levels_lower=params.get("signal_p10"),
+            metric_name="unifi_client_signal_p10",
+            render_func=lambda v: f"{v} dBm",
+            label="Signal 10th percentile"
+        )
+        yield Result(
+            state=State.OK,
+            summary=f"Median {clients.signal_p50} dBm, 90th percentile {clients.signal_p90} dBm"
+        )
+        yield Metric("unifi_client_signal_p50",clients.signal_p50)
+        yield Metric("unifi_client_signal_p90",clients.signal_p90)
+        yield Result(
+            state=State.OK,
+            notice=f"Signal: {_render_histogram(clients.signal_hist,UNIFI_SIGNAL_BUCKETS,'dBm')}"
+        )
+    for _key,_label in (("tx_rate","TX Rate"),("rx_rate","RX Rate")):
+        _p50 = getattr(clients,f"{_key}_p50")
+        if _p50 is None:
+            continue
+        yield Result(
+            state=State.OK,
+            notice=f"{_label} 10th/50th/90th percentile: {getattr(clients,f'{_key}_p10')}/{_p50}/{getattr(clients,f'{_key}_p90')} Mbit/s"
+        )
+        yield Result(
+            state=State.OK,
+            notice=f"{_label}: {_render_histogram(getattr(clients,f'{_key}_hist'),UNIFI_RATE_BUCKETS,'Mbit/s')}"
+        )
+        yield Metric(f"unifi_client_{_key}_p50",_p50 * 1000000)
+    if clients.satisfaction_p50 is not None:
+        yield Result(
+            state=State.OK,
+            notice=f"Satisfaction 10th/50th percentile: {clients.satisfaction_p10}%/{clients.satisfaction_p50}%"
+        )
+    if clients.num_clients:
+        yield from check_levels(
+            clients.poor_satisfaction * 100.0 / clients.num_clients,
+            levels_upper=params.get("poor_satisfaction"),
+            render_func=render.percent,
+            label=f"Poor Satisfaction ({clients.poor_satisfaction} Clients)"
+        )
+    yield Metric("unifi_clients_poor_satisfaction",clients.poor_satisfaction)
+
+def discovery_unifi_clients(section):
+    for _item in section:
+        yield Service(item=_item)
+
+def check_unifi_clients(item,params,section):
+    _clients = section.get(item)
+    if _clients:
+        yield from _check_unifi_clients(params,_clients)
+
+def check_unifi_site_clients(item,params,section):
+    _clients = section.get(item)
+    if not _clients:
+        return
+    yield from _check_unifi_clients(params,_clients)
+    yield Result(
+        state=State.OK,
+        summary=f"{_clients.num_wired} Wired"
+    )
+    yield Metric("unifi_wired_clients",_clients.num_wired)
+    for _radio,_band in (("ng","2.4Ghz"),("na","5Ghz"),("6e","6Ghz")):
+        _count = getattr(_clients,f"num_clients_{_radio}")
+        yield Result(
+            state=State.OK,
+            notice=f"{_band}: {_count} Clients"
+        )
+
+register.agent_section(
+    name = 'unifi_clients',
+    parse_function = parse_unifi_clients
+)
+
+register.check_plugin(
+    name='unifi_clients',
+    service_name='Clients %s',
+    discovery_function=discovery_unifi_clients,
+    check_default_parameters={
+        "poor_satisfaction" : (10.0,25.0)
+    },
+    check_ruleset_name="unifi_clients",
+    check_function=check_unifi_clients,
+)
+
+register.agent_section(
+    name = 'unifi_site_clients',
+    parse_function = parse_unifi_site_clients
+)
+
+register.check_plugin(
+    name='unifi_site_clients',
+    service_name='Site %s Clients',
+    discovery_function=discovery_unifi_clients,
+    check_default_parameters={
+        "poor_satisfaction" : (10.0,25.0)
+    },
+    check_ruleset_name="unifi_clients",
+    check_function=check_unifi_site_clients,
+)
+
+############ Neighbors ###########
+@dataclass
+class unifi_neighbors_record:
+    num_neighbors       : int = 0
+    num_rogue           : int = 0
+    strongest_signal    : Optional[int] = None
+    channel             : Optional[int] = None
+    co_channel          : Optional[int] = None
+    co_channel_signal   : Optional[int] = None
+
+@dataclass
+class unifi_site_neighbors_record:
+    desc                : str = ""
+    num_neighbors       : int = 0
+    num_rogue           : int = 0
+    num_neighbors_ng    : int = 0
+    num_neighbors_na    : int = 0
+    num_neighbors_6e    : int = 0
+    strongest_signal_ng : Optional[int] = None
+    strongest_signal_na : Optional[int] = None
+    strongest_signal_6e : Optional[int] = None
+    channels_ng         : str = ""
+    channels_na         : str = ""
+    channels_6e         : str = ""
+
+def parse_unifi_neighbors(string_table) -> Dict[str, unifi_neighbors_record]:
+    ## per band of an access point, e.g. "5Ghz"
+    return {
+        _item: _typed_record(unifi_neighbors_record,_data)
+        for _item,_data in parse_unifi_nested_dict(string_table).items()
+    }
+
+def parse_unifi_site_neighbors(string_table) -> Dict[str, unifi_site_neighbors_record]:
+    _ret = {}
+    for _site in parse_unifi_nested_dict(string_table).values():
+        _record = _typed_record(unifi_site_neighbors_record,_site)
+        _ret.setdefault(_record.desc,_record)
+    return _ret
+
+def _check_unifi_rogue(params,num_rogue):
+    yield from check_levels(
+        num_rogue,
+        levels_upper=params.get("rogue"),
+        metric_name="unifi_rogue_aps",
+        render_func=lambda v: f"{v:.0f}",
+        label="Rogue APs"
+    )
+
+def discovery_unifi_neighbors(section):
+    for _item in section:
+        yield Service(item=_item)
+
+def check_unifi_neighbors(item,params,section):
+    _neighbors = section.get(item)
+    if not _neighbors:
+        return
+    yield Result(
+        state=State.OK,
+        summary=f"Neighbors: {_neighbors.num_neighbors}"
+    )
+    yield Metric("unifi_neighbor_aps",_neighbors.num_neighbors)
+    yield from _check_unifi_rogue(params,_neighbors.num_rogue)
+    if _neighbors.strongest_signal is not None:
+        yield Result(
+            state=State.OK,
+            notice=f"Strongest Neighbor: {_neighbors.strongest_signal} dBm"
+        )
+    if _neighbors.channel is None:
+        return
+    yield from check_levels(
+        _neighbors.co_channel or 0,
+        levels_upper=params.get("co_channel"),
+        metric_name="unifi_co_channel_aps",
+        render_func=lambda v: f"{v:.0f}",
+        label=f"On Channel {_neighbors.channel}"
+    )
+    if _neighbors.co_channel_signal is not None:
+        yield from check_levels(
+            _neighbors.co_channel_signal,
+            levels_upper=params.get("co_channel_signal"),
+            metric_name="unifi_co_channel_signal",
+            render_func=lambda v: f"{v} dBm",
+            label="Strongest on Channel"
+        )
+
+def check_unifi_site_neighbors(item,params,section):
+    _neighbors = section.get(item)
+    if not _neighbors:
+        return
+    yield Result(
+        state=State.OK,
+        summary=f"Neighbors: {_neighbors.num_neighbors}"
+    )
+    yield Metric("unifi_neighbor_aps",_neighbors.num_neighbors)
+    yield from _check_unifi_rogue(params,_neighbors.num_rogue)
+    for _radio,_band in (("ng","2.4Ghz"),("na","5Ghz"),("6e","6Ghz")):
+        _count = getattr(_neighbors,f"num_neighbors_{_radio}")
+        if not _count:
+            continue
+        yield Result(
+            state=State.OK,
+            notice=f"{_band}: {_count} Neighbors, strongest {getattr(_neighbors,f'strongest_signal_{_radio}')} dBm, "
+                   f"per channel {getattr(_neighbors,f'channels_{_radio}')}"
+        )
+
+register.agent_section(
+    name = 'unifi_neighbors',
+    parse_function = parse_unifi_neighbors
+)
+
+register.check_plugin(
+    name='unifi_neighbors',
+    service_name='Neighbors %s',
+    discovery_function=discovery_unifi_neighbors,
+    check_default_parameters={
+        "rogue" : (1,10)
+    },
+    check_ruleset_name="unifi_neighbors",
+    check_function=check_unifi_neighbors,
+)
+
+register.agent_section(
+    name = 'unifi_site_neighbors',
+    parse_function = parse_unifi_site_neighbors
+)
+
+register.check_plugin(
+    name='unifi_site_neighbors',
+    service_name='Site %s Neighbors',
+    discovery_function=discovery_unifi_neighbors,
+    check_default_parameters={
+        "rogue" : (1,10)
+    },
+    check_ruleset_name="unifi_neighbors",
+    check_function=check_unifi_site_neighbors,
+)
+
+############ Protect ###########
+@dataclass
+class unifi_protect_nvr_section:
+    name                    : str = ""
+    model                   : str = ""
+    version                 : str = ""
+    firmware                : str = ""
+    storage_total           : int = 0
+    storage_used            : int = 0
+    storage_recycling       : int = 0
+    disks                   : int = 0
+    disks_failed            : int = 0
+    retention               : Optional[int] = None
+    recording_disabled      : int = 0
+    cloud_connected         : int = 0
+    update_available        : int = 0
+    cpu_load                : Optional[float] = None
+    temperature             : Optional[float] = None
+    cameras                 : int = 0
+    cameras_connected       : int = 0
+    cameras_recording       : int = 0
+    cameras_not_recording   : str = ""
+    sensors                 : int = 0
+    sensors_connected       : int = 0
+
+@dataclass
+class unifi_protect_camera_section:
+    name                    : str = ""
+    model                   : str = ""
+    mac                     : str = ""
+    ip                      : str = ""
+    firmware                : str = ""
+    state                   : str = ""
+    is_recording            : int = 0
+    recording_mode          : str = ""
+    last_motion             : Optional[int] = None
+    fps                     : Optional[float] = None
+    bitrate                 : Optional[int] = None
+    resolution              : str = ""
+    phy_rate                : Optional[int] = None
+    wifi_signal             : Optional[int] = None
+
+@dataclass
+class unifi_protect_sensor_section:
+    name                    : str = ""
+    model                   : str = ""
+    mac                     : str = ""
+    firmware                : str = ""
+    state                   : str = ""
+    mount_type              : str = ""
+    battery                 : Optional[int] = None
+    battery_low             : int = 0
+    temperature             : Optional[float] = None
+    humidity                : Optional[float] = None
+    light                   : Optional[float] = None
+    is_opened               : Optional[int] = None
+    signal                  : Optional[int] = None
+
+def parse_unifi_protect_nvr(string_table) -> unifi_protect_nvr_section:
+    return _typed_record(unifi_protect_nvr_section,parse_unifi_dict(string_table))
+
+def parse_unifi_protect_camera(string_table) -> unifi_protect_camera_section:
+    return _typed_record(unifi_protect_camera_section,parse_unifi_dict(string_table))
+
+def parse_unifi_protect_sensor(string_table) -> unifi_protect_sensor_section:
+    return _typed_record(unifi_protect_sensor_section,parse_unifi_dict(string_table))
+
+def discovery_unifi_protect(section):
+    if section.name:
+        yield Service()
+
+def _check_unifi_protect_state(section):
+    yield Result(
+        state=State.OK if section.state == "CONNECTED" else State.CRIT,
+        summary=f"State: {section.state.lower() or 'unknown'}"
+    )
+    yield Result(
+        state=State.OK,
+        summary=f"{section.model} Firmware: {section.firmware}" if section.firmware else section.model
+    )
+
+def check_unifi_protect_nvr(params,section):
+    yield Result(
+        state=State.OK,
+        summary=f"{section.model} Version: {section.version}"
+    )
+    if section.update_available:
+        yield Result(
+            state=State.WARN,
+            notice=_("Update available")
+        )
+    if section.storage_total:
+        yield from check_levels(
+            section.storage_used * 100.0 / section.storage_total,
+            levels_upper=params.get("storage"),
+            metric_name="unifi_protect_storage_used",
+            render_func=render.percent,
+            label=f"Storage used ({render.bytes(section.storage_used)} of {render.bytes(section.storage_total)})"
+        )
+    if section.storage_recycling:
+        yield Result(
+            state=State.OK,
+            notice="Storage full, oldest recordings are overwritten"
+        )
+    if section.disks:
+        yield Result(
+            state=State.CRIT if section.disks_failed else State.OK,
+            summary=f"{section.disks_failed} of {section.disks} Disks failed" if section.disks_failed else f"{section.disks} Disks healthy"
+        )
+    if section.retention is not None:
+        _levels = params.get("retention")
+        yield from check_levels(
+            section.retention,
+            levels_lower=(_levels[0] * 86400,_levels[1] * 86400) if _levels else None,
+            render_func=render.timespan,
+            label="Retention"
+        )
+    if section.recording_disabled:
+        yield Result(
+            state=State.WARN,
+            summary="Recording disabled"
+        )
+    yield Result(
+        state=State.OK,
+        summary=f"Cameras: {section.cameras_connected}/{section.cameras} connected, {section.cameras_recording} recording"
+    )
+    yield Metric("unifi_protect_cameras",section.cameras)
+    yield Metric("unifi_protect_cameras_connected",section.cameras_connected)
+    yield Metric("unifi_protect_cameras_recording",section.cameras_recording)
+    if section.cameras_not_recording:
+        yield Result(
+            state=State.WARN,
+            summary=f"Not recording: {section.cameras_not_recording.replace(',',', ')}"
+        )
+    if section.sensors:
+        yield Result(
+            state=State.OK,
+            notice=f"Sensors: {section.sensors_connected}/{section.sensors} connected"
+        )
+    if section.temperature is not None:
+        yield from check_levels(
+            section.temperature,
+            levels_upper=params.get("temperature"),
+            metric_name="temp",
+            render_func=lambda v: f"{v:.1f} °C",
+            label="Temperature"
+        )
+    if section.cpu_load is not None:
+        yield Result(
+            state=State.OK,
+            notice=f"CPU Load: {section.cpu_load}"
+        )
+    yield Result(
+        state=State.OK,
+        notice=f"Cloud connected: {'yes' if section.cloud_connected else 'no'}"
+    )
+
+def check_unifi_protect_camera(params,section):
+    yield from _check_unifi_protect_state(section)
+    if section.state != "CONNECTED":
+        return
+    if section.recording_mode != "never":
+        yield Result(
+            state=State.OK if section.is_recording else State.WARN,
+            summary="Recording" if section.is_recording else f"Not recording (Mode {section.recording_mode})"
+        )
+    if section.fps is not None:
+        yield from check_levels(
+            section.fps,
+            levels_lower=params.get("fps"),
+            metric_name="unifi_protect_fps",
+            render_func=lambda v: f"{v:.0f} fps",
+            label="Frame rate"
+        )
+    if section.bitrate is not None:
+        yield Result(
+            state=State.OK,
+            summary=f"Bitrate: {render.networkbandwidth(section.bitrate / 8)}"
+        )
+        yield Metric("unifi_protect_bitrate",section.bitrate)
+    if section.resolution:
+        yield Result(
+            state=State.OK,
+            notice=f"Resolution: {section.resolution}"
+        )
+    if section.last_motion is not None:
+        yield Result(
+            state=State.OK,
+            notice=f"Last motion: {render.timespan(section.last_motion)} ago"
+        )
+    if section.phy_rate:
+        yield Result(
+            state=State.OK,
+            notice=f"Link: {section.phy_rate} Mbit/s"
+        )
+    if section.wifi_signal is not None:
+        yield Result(
+            state=State.OK,
+            notice=f"WiFi Signal: {section.wifi_signal} dBm"
+        )
+
+def check_unifi_protect_sensor(params,section):
+    yield from _check_unifi_protect_state(section)
+    if section.state != "CONNECTED":
+        return
+    if section.battery is not None:
+        yield from check_levels(
+            section.battery,
+            levels_lower=params.get("battery"),
+            metric_name="unifi_protect_battery",
+            render_func=render.percent,
+            label="Battery"
+        )
+    if section.battery_low:
+        yield Result(
+            state=State.WARN,
+            summary="Battery low"
+        )
+    if section.is_opened is not None and section.mount_type in ("door","window","garage"):
+        yield Result(
+            state=State.OK,
+            summary=f"{section.mount_type.capitalize()} {'open' if section.is_opened else 'closed'}"
+        )
+    if section.temperature is not None:
+        yield Result(
+            state=State.OK,
+            summary=f"Temperature: {section.temperature:.1f} °C"
+        )
+        yield Metric("temp",section.temperature)
+    if section.humidity is not None:
+        yield Result(
+            state=State.OK,
+            summary=f"Humidity: {section.humidity:.0f}%"
+        )
+        yield Metric("humidity",section.humidity)
+    if section.light is not None:
+        yield Result(
+            state=State.OK,
+            notice=f"Light: {section.light:.0f} lx"
+        )
+        yield Metric("unifi_protect_light",section.light)
+    if section.signal is not None:
+        yield Result(
+            state=State.OK,
+            notice=f"Bluetooth Signal: {section.signal} dBm"
+        )
+
+def inventory_unifi_protect(section):
+    _hwdict = {
+        "vendor"    : "ubiquiti",
+    }
+    for _key in ("model","mac"):
+        _val = getattr(section,_key,"")
+        if _val:
+            _hwdict[_key] = _val
+    yield Attributes(
+        path=["hardware","system"],
+        inventory_attributes= _hwdict
+    )
+    yield Attributes(
+        path=["software","os"],
+        inventory_attributes={
+            "version"   : section.firmware or None
+        }
+    )
+
+register.agent_section(
+    name = 'unifi_protect_nvr',
+    parse_function = parse_unifi_protect_nvr
+)
+
+register.check_plugin(
+    name='unifi_protect_nvr',
+    service_name='Unifi Protect NVR',
+    discovery_function=discovery_unifi_protect,
+    check_default_parameters={
+        "temperature"   : (70.0,80.0)
+    },
+    check_ruleset_name="unifi_protect_nvr",
+    check_function=check_unifi_protect_nvr,
+)
+
+register.agent_section(
+    name = 'unifi_protect_camera',
+    parse_function = parse_unifi_protect_camera
+)
+
+register.check_plugin(
+    name='unifi_protect_camera',
+    service_name='Unifi Protect Camera',
+    discovery_function=discovery_unifi_protect,
+    check_default_parameters={},
+    check_ruleset_name="unifi_protect_camera",
+    check_function=check_unifi_protect_camera,
+)
+
+register.inventory_plugin(
+    name = "unifi_protect_camera",
+    inventory_function = inventory_unifi_protect
+)
+
+register.agent_section(
+    name = 'unifi_protect_sensor',
+    parse_function = parse_unifi_protect_sensor
+)
+
+register.check_plugin(
+    name='unifi_protect_sensor',
+    service_name='Unifi Protect Sensor',
+    discovery_function=discovery_unifi_protect,
+    check_default_parameters={
+        "battery"   : (20.0,10.0)
+    },
+    check_ruleset_name="unifi_protect_sensor",
+    check_function=check_unifi_protect_sensor,
+)
+
+register.inventory_plugin(
+    name = "unifi_protect_sensor",
+    inventory_function = inventory_unifi_protect
+)
+
+############ Agent Performance ###########
+@dataclass
+class unifi_api_endpoint:
+    requests        : int = 0
+    errors          : int = 0
+    seconds         : float = 0.0
+    max_seconds     : float = 0.0
+    slowest         : str = ""
+    bytes           : int = 0
+    records         : int = 0
+
+@dataclass
+class unifi_agent_perf_section:
+    phases          : Dict[str, float]
+    endpoints       : Dict[str, unifi_api_endpoint]
+
+def parse_unifi_agent_perf(string_table) -> unifi_agent_perf_section:
+    ## one line per api request of the last agent run, summed up per endpoint
+    _ret = unifi_agent_perf_section(phases={},endpoints={})
+    for _line in string_table:
+        if _line[0] == "phase" and len(_line) == 3:
+            _ret.phases[_line[1]] = _safe_float(_line[2])
+        elif _line[0] == "request" and len(_line) == 8:
+            _method,_endpoint,_site,_status,_seconds,_bytes,_records = _line[1:]
+            _api = _ret.endpoints.setdefault(_endpoint,unifi_api_endpoint())
+            _seconds = _safe_float(_seconds)
+            _api.requests += 1
+            _api.seconds += _seconds
+            _api.bytes += _safe_int(_bytes)
+            _api.records += _safe_int(_records)
+            if not 200 <= _safe_int(_status) < 400:
+                _api.errors += 1
+            if _seconds >= _api.max_seconds:
+                _api.max_seconds = _seconds
+                _api.slowest = _site
+    return _ret
+
+def discovery_unifi_agent_perf(section):
+    if section.phases:
+        yield Service()
+
+def check_unifi_agent_perf(params,section):
+    yield from check_levels(
+        section.phases.get("total",0.0),
+        levels_upper=params.get("runtime"),
+        metric_name="unifi_agent_runtime",
+        render_func=render.timespan,
+        label="Runtime"
+    )
+    for _phase in ("login","build","serialize"):
+        if _phase in section.phases:
+            yield from check_levels(
+                section.phases[_phase],
+                metric_name=f"unifi_agent_{_phase}_time",
+                render_func=render.timespan,
+                label=_phase.capitalize(),
+                notice_only=True
+            )
+    _apis = section.endpoints.values()
+    yield Result(
+        state=State.OK,
+        summary=f"{sum(_api.requests for _api in _apis)} API Requests, {render.bytes(sum(_api.bytes for _api in _apis))}"
+    )
+    yield Metric("unifi_api_requests",sum(_api.requests for _api in _apis))
+    yield Metric("unifi_api_response_bytes",sum(_api.bytes for _api in _apis))
+    _errors = sum(_api.errors for _api in _apis)
+    if _errors:
+        yield Result(
+            state=State.WARN,
+            summary=f"{_errors} failed Requests"
+        )
+
+## only requested when the session has to be renewed
+UNIFI_LOGIN_ENDPOINTS = frozenset(["/","/api/login","/api/auth/login"])
+
+def discovery_unifi_api_endpoint(section):
+    for _endpoint in section.endpoints:
+        if _endpoint not in UNIFI_LOGIN_ENDPOINTS:
+            yield Service(item=_endpoint)
+
+def check_unifi_api_endpoint(item,params,section):
+    _value_store = get_value_store()
+    _api = section.endpoints.get(item)
+    if not _api:
+        ## cached responses (e.g. /rest/portconf) are not requested on every run
+        _last = _value_store.get("last_request")
+        _age = f", last request {render.timespan(max(0,time.time() - _last))} ago" if _last else ""
+        yield Result(
+            state=State.OK,
+            summary=f"Not requested in this run{_age}"
+        )
+        return
+    _value_store["last_request"] = time.time()
+    yield from check_levels(
+        _api.max_seconds,
+        levels_upper=params.get("max_latency"),
+        metric_name="unifi_api_latency_max",
+        render_func=render.timespan,
+        label="Slowest Request"
+    )
+    if _api.slowest:
+        yield Result(
+            state=State.OK,
+            notice=f"Slowest Site: {_api.slowest}"
+        )
+    yield from check_levels(
+        _api.seconds / _api.requests,
+        levels_upper=params.get("avg_latency"),
+        metric_name="unifi_api_latency_avg",
+        render_func=render.timespan,
+        label="Average"
+    )
+    yield Result(
+        state=State.OK,
+        summary=f"{_api.requests} Requests, {render.bytes(_api.bytes)}, {_api.records} Records"
+    )
+    yield Metric("unifi_api_requests",_api.requests)
+    yield Metric("unifi_api_response_bytes",_api.bytes)
+    yield Metric("unifi_api_records",_api.records)
+    if _api.errors:
+        yield Result(
+            state=State.WARN,
+            summary=f"{_api.errors} failed Requests"
+        )
+
+register.agent_section(
+    name = 'unifi_agent_perf',
+    parse_function = parse_unifi_agent_perf
+)
+
+register.check_plugin(
+    name='unifi_agent_perf',
+    service_name='Unifi Agent Performance',
+    discovery_function=discovery_unifi_agent_perf,
+    check_default_parameters={
+        "runtime"   : (40.0,55.0)
+    },
+    check_ruleset_name="unifi_agent_perf",
+    check_function=check_unifi_agent_perf,
+)
+
+register.check_plugin(
+    name='unifi_api_endpoint',
+    sections=["unifi_agent_perf"],
+    service_name='Unifi API %s',
+    discovery_function=discovery_unifi_api_endpoint,
+    check_default_parameters={
+        "max_latency"   : (5.0,8.0)
+    },
+    check_ruleset_name="unifi_api_endpoint",
+    check_function=check_unifi_api_endpoint,
+)
@@ -268,4 +268,210 @@ metric_info["unifi_uptime"] = {
     "color" : "#80f000",
 }
 
+metric_info["unifi_agent_runtime"] = {
+    "title" : _("Agent runtime"),
+    "unit"  : "s",
+    "color" : "11/a",
+}
+metric_info["unifi_agent_login_time"] = {
+    "title" : _("Agent login"),
+    "unit"  : "s",
+    "color" : "31/a",
+}
+metric_info["unifi_agent_build_time"] = {
+    "title" : _("Agent build"),
+    "unit"  : "s",
+    "color" : "23/a",
+}
+metric_info["unifi_agent_serialize_time"] = {
+    "title" : _("Agent serialize"),
+    "unit"  : "s",
+    "color" : "44/a",
+}
+graph_info["unifi_agent_phases"] = {
+    "title" : _("Unifi Agent Phases"),
+    "metrics" : [
+        ("unifi_agent_login_time","stack"),
+        ("unifi_agent_build_time","stack"),
+        ("unifi_agent_serialize_time","stack"),
+        ("unifi_agent_runtime","line"),
+    ],
+}
+metric_info["unifi_api_latency_max"] = {
+    "title" : _("Slowest API request"),
+    "unit"  : "s",
+    "color" : "13/a",
+}
+metric_info["unifi_api_latency_avg"] = {
+    "title" : _("Average API request"),
+    "unit"  : "s",
+    "color" : "33/a",
+}
+graph_info["unifi_api_latency"] = {
+    "title" : _("Unifi API Latency"),
+    "metrics" : [
+        ("unifi_api_latency_max","line"),
+        ("unifi_api_latency_avg","area"),
+    ],
+    "scalars" : [
+        "unifi_api_latency_max:warn",
+        "unifi_api_latency_max:crit",
+    ],
+}
+metric_info["unifi_api_requests"] = {
+    "title" : _("API requests"),
+    "unit"  : "count",
+    "color" : "42/a",
+}
+metric_info["unifi_api_response_bytes"] = {
+    "title" : _("API response size"),
+    "unit"  : "bytes",
+    "color" : "25/a",
+}
+metric_info["unifi_api_records"] = {
+    "title" : _("API records"),
+    "unit"  : "count",
+    "color" : "35/a",
+}
+
+metric_info["unifi_clients"] = {
+    "title" : _("Wireless clients"),
+    "unit"  : "count",
+    "color" : "42/a",
+}
+metric_info["unifi_guest_clients"] = {
+    "title" : _("Guest clients"),
+    "unit"  : "count",
+    "color" : "22/a",
+}
+metric_info["unifi_wired_clients"] = {
+    "title" : _("Wired clients"),
+    "unit"  : "count",
+    "color" : "12/a",
+}
+metric_info["unifi_clients_poor_satisfaction"] = {
+    "title" : _("Clients with poor satisfaction"),
+    "unit"  : "count",
+    "color" : "14/a",
+}
+metric_info["unifi_client_signal_p10"] = {
+    "title" : _("Client signal 10th percentile"),
+    "unit"  : "db",
+    "color" : "13/a",
+}
+metric_info["unifi_client_signal_p50"] = {
+    "title" : _("Client signal median"),
+    "unit"  : "db",
+    "color" : "33/a",
+}
+metric_info["unifi_client_signal_p90"] = {
+    "title" : _("Client signal 90th percentile"),
+    "unit"  : "db",
+    "color" : "43/a",
+}
+graph_info["unifi_client_signal"] = {
+    "title" : _("Client Signal"),
+    "metrics" : [
+        ("unifi_client_signal_p90","line"),
+        ("unifi_client_signal_p50","line"),
+        ("unifi_client_signal_p10","line"),
+    ],
+    "range" : (-100,0)
+}
+metric_info["unifi_client_tx_rate_p50"] = {
+    "title" : _("Client TX rate median"),
+    "unit"  : "bits/s",
+    "color" : "23/a",
+}
+metric_info["unifi_client_rx_rate_p50"] = {
+    "title" : _("Client RX rate median"),
+    "unit"  : "bits/s",
+    "color" : "31/a",
+}
+graph_info["unifi_client_rates"] = {
+    "title" : _("Client Rates"),
+    "metrics" : [
+        ("unifi_client_tx_rate_p50","line"),
+        ("unifi_client_rx_rate_p50","line"),
+    ],
+}
+
+metric_info["unifi_neighbor_aps"] = {
+    "title" : _("Neighbor access points"),
+    "unit"  : "count",
+    "color" : "44/a",
+}
+metric_info["unifi_rogue_aps"] = {
+    "title" : _("Rogue access points"),
+    "unit"  : "count",
+    "color" : "14/a",
+}
+metric_info["unifi_co_channel_aps"] = {
+    "title" : _("Neighbors on the own channel"),
+    "unit"  : "count",
+    "color" : "24/a",
+}
+metric_info["unifi_co_channel_signal"] = {
+    "title" : _("Strongest neighbor on the own channel"),
+    "unit"  : "db",
+    "color" : "33/a",
+}
+graph_info["unifi_neighbor_aps"] = {
+    "title" : _("Neighbor Access Points"),
+    "metrics" : [
+        ("unifi_neighbor_aps","area"),
+        ("unifi_co_channel_aps","line"),
+        ("unifi_rogue_aps","line"),
+    ],
+}
+
+metric_info["unifi_protect_storage_used"] = {
+    "title" : _("Protect storage used"),
+    "unit"  : "%",
+    "color" : "16/a",
+}
+metric_info["unifi_protect_cameras"] = {
+    "title" : _("Cameras"),
+    "unit"  : "count",
+    "color" : "42/a",
+}
+metric_info["unifi_protect_cameras_connected"] = {
+    "title" : _("Connected cameras"),
+    "unit"  : "count",
+    "color" : "22/a",
+}
+metric_info["unifi_protect_cameras_recording"] = {
+    "title" : _("Recording cameras"),
+    "unit"  : "count",
+    "color" : "12/a",
+}
+graph_info["unifi_protect_cameras"] = {
+    "title" : _("Protect Cameras"),
+    "metrics" : [
+        ("unifi_protect_cameras","area"),
+        ("unifi_protect_cameras_connected","line"),
+        ("unifi_protect_cameras_recording","line"),
+    ],
+}
+metric_info["unifi_protect_fps"] = {
+    "title" : _("Frame rate"),
+    "unit"  : "count",
+    "color" : "23/a",
+}
+metric_info["unifi_protect_bitrate"] = {
+    "title" : _("Stream bitrate"),
+    "unit"  : "bits/s",
+    "color" : "31/a",
+}
+metric_info["unifi_protect_battery"] = {
+    "title" : _("Battery"),
+    "unit"  : "%",
+    "color" : "34/a",
+}
+metric_info["unifi_protect_light"] = {
+    "title" : _("Light"),
+    "unit"  : "count",
+    "color" : "26/a",
+}
+
 check_metrics["check_mk-unifi_network_ports_if"] = translation.if_translation
@@ -26,16 +26,22 @@ from cmk.gui.i18n import _
 from cmk.gui.plugins.wato import (
     HostRulespec,
     CheckParameterRulespecWithItem,
+    CheckParameterRulespecWithoutItem,
+    RulespecGroupCheckParametersNetworking,
     IndividualOrStoredPassword,
     rulespec_registry,
 )
 from cmk.gui.valuespec import (
     Dictionary,
     Tuple,
+    Float,
     Alternative,
     NetworkPort,
     Checkbox,
     TextAscii,
+    Integer,
+    ListOfStrings,
+    ListOf,
 )
 
 from cmk.gui.plugins.wato.datasource_programs import RulespecGroupDatasourceProgramsHardware
@@ -44,7 +50,7 @@ def _valuespec_special_agent_unifi_controller():
     return Dictionary(
         title = _('Unifi Controller via API'),
         help = _('This rule selects the Unifi API agent'),
-        optional_keys=['site'],
+        optional_keys=['site','workers','no_cache','basic_devices','piggyback_hosts','piggyback_hosts_file','section_cache','stream','compact','clients','rogueap','events','controllers','max_controllers','from_spool','spool'],
         elements=[
             ('user',TextAscii(title = _('API Username.'),allow_empty = False,)),
             ('password',IndividualOrStoredPassword(title = _('API password'),allow_empty = False,)),
@@ -61,7 +67,118 @@ def _valuespec_special_agent_unifi_controller():
                     ],
                     default_value = "name"
                 )
-            )
+            ),
+            ('workers',Integer(
+                title = _('Concurrent requests'),
+                help = _('Collect the sites of the controller with this number of parallel API requests, '
+                         'with further controllers this is the limit for all controllers together'),
+                minvalue = 1,
+                maxvalue = 32,
+                default_value = 4
+            )),
+            ('stream', Checkbox(
+                title = _("Stream output site by site"),
+                help = _("Every site is fetched, written and released before the next one is collected. "
+                         "This limits the memory of the agent on controllers with many sites, the device shortlist and "
+                         "the ssid list follow after the last site."),
+                default_value = False
+            )),
+            ('compact', Checkbox(
+                title = _("Compact output format"),
+                help = _("Write one json object per port, radio, ssid and site instead of one key|value line per attribute. "
+                         "The output is smaller and parsed faster, the check plugins read both formats."),
+                default_value = False
+            )),
+            ('clients', Checkbox(
+                title = _("Collect client statistics"),
+                help = _("Request the client list of every site and write the number of clients, signal and rate percentiles "
+                         "and histograms per access point, ssid and band. The clients are aggregated while they are received, "
+                         "but the client list is an additional large request per site."),
+                default_value = False
+            )),
+            ('rogueap',Integer(
+                title = _("Collect neighbor access points seen within"),
+                help = _("Request the neighbor access points heard by the own access points in this time and write the number "
+                         "of neighbors, rogue access points and neighbors on the own channel per access point and band."),
+                unit = _("hours"),
+                minvalue = 1,
+                maxvalue = 720,
+                default_value = 24
+            )),
+            ('events', Checkbox(
+                title = _("Collect events and alarms"),
+                help = _("Write the events and open alarms of every site that are new since the last run to the logfiles "
+                         "\"Unifi Events SITE\" and \"Unifi Alarms SITE\" of the logwatch check. The newest entry of every site is "
+                         "remembered between the runs and at most 200 new entries per site and run are written."),
+                default_value = False
+            )),
+            ('no_cache', Checkbox(
+                title = _("Bypass response cache"),
+                help = _("Rarely changing data like the port configurations is cached for an hour, enable this to fetch it on every run"),
+                default_value = False
+            )),
+            ('basic_devices', Checkbox(
+                title = _("Fetch full device stats only for piggyback hosts"),
+                help = _("List the devices with their basic data and request the full statistics only for adopted devices "
+                         "which get piggyback data and for the controller itself. The device inventory of unadopted devices "
+                         "then only contains model, type and state."),
+                default_value = False
+            )),
+            ('piggyback_hosts', ListOfStrings(
+                title = _("Only deliver piggyback data for these hosts"),
+                help = _("Host names or IPs (matching 'Receive piggyback data by') of the devices monitored in checkmk. "
+                         "Only these devices are requested in detail and get piggyback data."),
+                allow_empty = False
+            )),
+            ('piggyback_hosts_file',TextAscii(
+                title = _("File with piggyback hosts"),
+                help = _("Path to a file on the checkmk server with one host name or IP per line, used like the list above"),
+                allow_empty = False
+            )),
+            ('section_cache',Integer(
+                title = _("Collect slow changing sections every"),
+                help = _("The device shortlist section is only collected in this interval "
+                         "and replayed with its age in between"),
+                unit = _("minutes"),
+                minvalue = 1,
+                default_value = 60
+            )),
+            ('controllers', ListOf(
+                Dictionary(
+                    optional_keys=['address'],
+                    elements=[
+                        ('host',TextAscii(title = _('Host name in checkmk'),allow_empty = False)),
+                        ('address',TextAscii(title = _('Host name or IP address of the controller'),allow_empty = False)),
+                        ('port',NetworkPort(title = _('Port'),default_value = 443)),
+                        ('user',TextAscii(title = _('API Username.'),allow_empty = False)),
+                        ('password',IndividualOrStoredPassword(title = _('API password'),allow_empty = False)),
+                    ]
+                ),
+                title = _("Further controllers"),
+                help = _("Poll these controllers in the same agent process. The output of each controller is delivered as "
+                         "piggyback data of its host, configure these hosts with 'No API integrations, no Checkmk agent'. "
+                         "All other options of this rule apply to every controller."),
+                add_label = _("Add controller")
+            )),
+            ('max_controllers',Integer(
+                title = _('Controllers polled at the same time'),
+                help = _('Number of further controllers that are polled in parallel, their site requests share the concurrent requests above'),
+                minvalue = 1,
+                maxvalue = 64,
+                default_value = 8
+            )),
+            ('from_spool',Checkbox(
+                title = _("Read the output of the collector"),
+                help = _("Return the output of an agent_unifi_controller --collector process running in the site "
+                         "instead of polling the controller. When the collector has not written its spool for longer "
+                         "than its interval, the sections get cached() headers with their age."),
+                default_value = False
+            )),
+            ('spool',TextAscii(
+                title = _("Spool file of the collector"),
+                help = _("Path on the checkmk server, by default spool_HOST_PORT.txt in the agent tmp directory of the site"),
+                allow_empty = False
+            )),
         ]
     )
 
@@ -99,3 +216,237 @@ rulespec_registry.register(
         title=lambda: _("Unifi Site Parameter")
     )
 )
+
+def _parameter_valuespec_unifi_agent_perf():
+    return Dictionary(
+        title = _("Unifi Agent Performance"),
+        elements = [
+            ('runtime', Tuple(
+                title = _("Levels on the runtime of the special agent"),
+                help = _("Warn before the agent runs into the timeout of the datasource program"),
+                elements = [
+                    Float(title = _("Warning at"),unit = _("seconds"),default_value = 40.0),
+                    Float(title = _("Critical at"),unit = _("seconds"),default_value = 55.0),
+                ]
+            )),
+        ]
+    )
+
+rulespec_registry.register(
+    CheckParameterRulespecWithoutItem(
+        check_group_name = "unifi_agent_perf",
+        group=RulespecGroupCheckParametersNetworking,
+        match_type = "dict",
+        parameter_valuespec=_parameter_valuespec_unifi_agent_perf,
+        title=lambda: _("Unifi Agent Performance")
+    )
+)
+
+def _item_spec_unifi_api_endpoint():
+    return TextAscii(
+        title=_("API Endpoint"),
+        help=_("Path of the API request, e.g. /stat/device")
+    )
+
+def _parameter_valuespec_unifi_api_endpoint():
+    return Dictionary(
+        title = _("Unifi API Latency"),
+        elements = [
+            ('max_latency', Tuple(
+                title = _("Levels on the slowest request"),
+                elements = [
+                    Float(title = _("Warning at"),unit = _("seconds"),default_value = 5.0),
+                    Float(title = _("Critical at"),unit = _("seconds"),default_value = 8.0),
+                ]
+            )),
+            ('avg_latency', Tuple(
+                title = _("Levels on the average request"),
+                elements = [
+                    Float(title = _("Warning at"),unit = _("seconds"),default_value = 2.0),
+                    Float(title = _("Critical at"),unit = _("seconds"),default_value = 5.0),
+                ]
+            )),
+        ]
+    )
+
+rulespec_registry.register(
+    CheckParameterRulespecWithItem(
+        check_group_name = "unifi_api_endpoint",
+        group=RulespecGroupCheckParametersNetworking,
+        item_spec = _item_spec_unifi_api_endpoint,
+        match_type = "dict",
+        parameter_valuespec=_parameter_valuespec_unifi_api_endpoint,
+        title=lambda: _("Unifi API Latency")
+    )
+)
+
+def _item_spec_unifi_clients():
+    return TextAscii(
+        title=_("SSID and band or site"),
+        help=_("e.g. Office 5Ghz on an access point or the site description on the controller")
+    )
+
+def _parameter_valuespec_unifi_clients():
+    return Dictionary(
+        title = _("Unifi Clients"),
+        elements = [
+            ('signal_p10', Tuple(
+                title = _("Lower levels on the signal of the weakest 10% of the clients"),
+                elements = [
+                    Integer(title = _("Warning below"),unit = _("dBm"),default_value = -75),
+                    Integer(title = _("Critical below"),unit = _("dBm"),default_value = -80),
+                ]
+            )),
+            ('poor_satisfaction', Tuple(
+                title = _("Levels on the clients with poor satisfaction"),
+                help = _("Share of the clients with a satisfaction below 50%"),
+                elements = [
+                    Float(title = _("Warning at"),unit = _("%"),default_value = 10.0),
+                    Float(title = _("Critical at"),unit = _("%"),default_value = 25.0),
+                ]
+            )),
+        ]
+    )
+
+rulespec_registry.register(
+    CheckParameterRulespecWithItem(
+        check_group_name = "unifi_clients",
+        group=RulespecGroupCheckParametersNetworking,
+        item_spec = _item_spec_unifi_clients,
+        match_type = "dict",
+        parameter_valuespec=_parameter_valuespec_unifi_clients,
+        title=lambda: _("Unifi Clients")
+    )
+)
+
+def _item_spec_unifi_neighbors():
+    return TextAscii(
+        title=_("Band or site"),
+        help=_("e.g. 5Ghz on an access point or the site description on the controller")
+    )
+
+def _parameter_valuespec_unifi_neighbors():
+    return Dictionary(
+        title = _("Unifi Neighbor Access Points"),
+        elements = [
+            ('rogue', Tuple(
+                title = _("Levels on the rogue access points"),
+                elements = [
+                    Integer(title = _("Warning at"),default_value = 1),
+                    Integer(title = _("Critical at"),default_value = 10),
+                ]
+            )),
+            ('co_channel', Tuple(
+                title = _("Levels on the neighbors on the own channel"),
+                elements = [
+                    Integer(title = _("Warning at"),default_value = 10),
+                    Integer(title = _("Critical at"),default_value = 20),
+                ]
+            )),
+            ('co_channel_signal', Tuple(
+                title = _("Levels on the strongest neighbor on the own channel"),
+                elements = [
+                    Integer(title = _("Warning at"),unit = _("dBm"),default_value = -65),
+                    Integer(title = _("Critical at"),unit = _("dBm"),default_value = -55),
+                ]
+            )),
+        ]
+    )
+
+rulespec_registry.register(
+    CheckParameterRulespecWithItem(
+        check_group_name = "unifi_neighbors",
+        group=RulespecGroupCheckParametersNetworking,
+        item_spec = _item_spec_unifi_neighbors,
+        match_type = "dict",
+        parameter_valuespec=_parameter_valuespec_unifi_neighbors,
+        title=lambda: _("Unifi Neighbor Access Points")
+    )
+)
+
+def _parameter_valuespec_unifi_protect_nvr():
+    return Dictionary(
+        title = _("Unifi Protect NVR"),
+        elements = [
+            ('storage', Tuple(
+                title = _("Levels on the used storage"),
+                help = _("Protect overwrites the oldest recordings when the storage is full, use the retention levels to watch the recorded time"),
+                elements = [
+                    Float(title = _("Warning at"),unit = _("%"),default_value = 90.0),
+                    Float(title = _("Critical at"),unit = _("%"),default_value = 95.0),
+                ]
+            )),
+            ('retention', Tuple(
+                title = _("Lower levels on the recording retention"),
+                elements = [
+                    Integer(title = _("Warning below"),unit = _("days"),default_value = 14),
+                    Integer(title = _("Critical below"),unit = _("days"),default_value = 7),
+                ]
+            )),
+            ('temperature', Tuple(
+                title = _("Levels on the CPU temperature"),
+                elements = [
+                    Float(title = _("Warning at"),unit = _("°C"),default_value = 70.0),
+                    Float(title = _("Critical at"),unit = _("°C"),default_value = 80.0),
+                ]
+            )),
+        ]
+    )
+
+rulespec_registry.register(
+    CheckParameterRulespecWithoutItem(
+        check_group_name = "unifi_protect_nvr",
+        group=RulespecGroupCheckParametersNetworking,
+        match_type = "dict",
+        parameter_valuespec=_parameter_valuespec_unifi_protect_nvr,
+        title=lambda: _("Unifi Protect NVR")
+    )
+)
+
+def _parameter_valuespec_unifi_protect_camera():
+    return Dictionary(
+        title = _("Unifi Protect Camera"),
+        elements = [
+            ('fps', Tuple(
+                title = _("Lower levels on the frame rate of the recorded stream"),
+                elements = [
+                    Integer(title = _("Warning below"),unit = _("fps"),default_value = 15),
+                    Integer(title = _("Critical below"),unit = _("fps"),default_value = 10),
+                ]
+            )),
+        ]
+    )
+
+rulespec_registry.register(
+    CheckParameterRulespecWithoutItem(
+        check_group_name = "unifi_protect_camera",
+        group=RulespecGroupCheckParametersNetworking,
+        match_type = "dict",
+        parameter_valuespec=_parameter_valuespec_unifi_protect_camera,
+        title=lambda: _("Unifi Protect Camera")
+    )
+)
+
+def _parameter_valuespec_unifi_protect_sensor():
+    return Dictionary(
+        title = _("Unifi Protect Sensor"),
+        elements = [
+            ('battery', Tuple(
+                title = _("Lower levels on the battery"),
+                elements = [
+                    Float(title = _("Warning below"),unit = _("%"),default_value = 20.0),
+                    Float(title = _("Critical below"),unit = _("%"),default_value = 10.0),
+                ]
+            )),
+        ]
+    )
+
+rulespec_registry.register(
+    CheckParameterRulespecWithoutItem(
+        check_group_name = "unifi_protect_sensor",
+        group=RulespecGroupCheckParametersNetworking,
+        match_type = "dict",
+        parameter_valuespec=_parameter_valuespec_unifi_protect_sensor,
+        title=lambda: _("Unifi Protect Sensor")
+    )
+)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8; py-indent-offset: 4 -*-
+#
+##  MIT License
+##
+##  Copyright (c) 2024 Bash Club
+##
+##  Permission is hereby granted, free of charge, to any person obtaining a copy
+##  of this software and associated documentation files (the "Software"), to deal
+##  in the Software without restriction, including without limitation the rights
+##  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+##  copies of the Software, and to permit persons to whom the Software is
+##  furnished to do so, subject to the following conditions:
+##
+##  The above copyright notice and this permission notice shall be included in all
+##  copies or substantial portions of the Software.
+##
+##  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+##  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+##  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+##  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+##  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+##  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+##  SOFTWARE.
+
+## Golden file test of the special agent against benchmark/mock_unifi_controller.py.
+## golden/agent_unifi_controller.txt is the output of the baseline agent for MOCK_ARGS,
+## the current agent has to write the same bytes apart from the sections added since.
+
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),"..")
+AGENT = os.path.join(REPO_DIR,"share","check_mk","agents","special","agent_unifi_controller")
+MOCK = os.path.join(REPO_DIR,"benchmark","mock_unifi_controller.py")
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)),"golden","agent_unifi_controller.txt")
+MOCK_ARGS = ["--sites","3","--devices-per-site","12","--ssids","2","--websocket-updates","0"]
+## sections the baseline agent did not write
+NEW_SECTIONS = frozenset(["unifi_topology","unifi_agent_perf"])
+
+@pytest.fixture(scope="module")
+def mock_port():
+    if not shutil.which("openssl"):
+        pytest.skip("the mock controller needs openssl for its certificate")
+    with socket.socket() as _socket:
+        _socket.bind(("127.0.0.1",0))
+        _port = _socket.getsockname()[1]
+    _process = subprocess.Popen([sys.executable,MOCK,"--port",str(_port)] + MOCK_ARGS,stdout=subprocess.DEVNULL,stderr=subprocess.DEVNULL)
+    try:
+        _end = time.monotonic() + 30
+        while True:
+            assert _process.poll() is None, "mock controller exited"
+            try:
+                with socket.create_connection(("127.0.0.1",_port),timeout=1):
+                    break
+            except OSError:
+                assert time.monotonic() < _end, "mock controller not listening"
+                time.sleep(0.1)
+        yield _port
+    finally:
+        _process.terminate()
+        _process.wait()
+
+def run_agent(port,*options):
+    _cmd = [sys.executable,AGENT,"-u","admin","-p","admin","--ignore-cert","--port",str(port)] + list(options) + ["127.0.0.1"]
+    ## outside of checkmk there is no session, response or section cache
+    return subprocess.run(_cmd,stdout=subprocess.PIPE,check=True,timeout=120).stdout
+
+def sections(output):
+    ## (piggyback host, header, body) of every section without the new ones
+    _sections = []
+    _host = b""
+    for _line in output.splitlines(keepends=True):
+        if _line.startswith(b"<<<<"):
+            _host = b"" if _line == b"<<<<>>>>\n" else _line
+            _sections.append((_line,b"",b""))
+        elif _line.startswith(b"<<<"):
+            _sections.append((_host,_line,b""))
+        else:
+            _piggyback,_header,_body = _sections[-1]
+            _sections[-1] = (_piggyback,_header,_body + _line)
+    _sections = [_section for _section in _sections if _section[1][3:-4].split(b":")[0].decode() not in NEW_SECTIONS]
+    ## the last piggyback host is closed before the unifi_agent_perf section of the controller
+    while _sections and _sections[-1] == (b"<<<<>>>>\n",b"",b""):
+        _sections.pop()
+    return _sections
+
+def without_new_sections(output):
+    return b"".join(_header + _body if _header else _host for _host,_header,_body in sections(output))
+
+@pytest.fixture(scope="module")
+def golden():
+    with open(GOLDEN,"rb") as _f:
+        return _f.read()
+
+@pytest.mark.parametrize("options",[[],["--workers","4"]],ids=["default","workers"])
+def test_output_matches_golden(mock_port,golden,options):
+    assert without_new_sections(run_agent(mock_port,*options)) == golden
+
+@pytest.mark.parametrize("options",[["--stream"],["--stream","--workers","4"]],ids=["stream","stream_workers"])
+def test_stream_writes_the_golden_sections(mock_port,golden,options):
+    ## --stream writes every site with its devices in one go, only the order of the sections differs
+    _stream = [_section for _section in sections(run_agent(mock_port,*options)) if _section[1]]
+    assert sorted(_stream) == sorted(_section for _section in sections(golden) if _section[1])
+
+def test_new_sections_are_written(mock_port):
+    _names = set(_line[3:-4].split(b":")[0].decode() for _line in run_agent(mock_port).splitlines(keepends=True)
+                 if _line.startswith(b"<<<") and not _line.startswith(b"<<<<"))
+    assert NEW_SECTIONS <= _names
+
+def test_failed_controller_gets_an_error_record(mock_port):
+    with socket.socket() as _socket:
+        _socket.bind(("127.0.0.1",0))
+        _closed = _socket.getsockname()[1]
+    _output = run_agent(mock_port,"--controller","down.example","127.0.0.1",str(_closed),"admin","admin",
+                        "--controller","up.example","127.0.0.1",str(mock_port),"admin","admin")
+    _sections = sections(_output)
+    _down = [_section for _section in _sections if _section[0] == b"<<<<down.example>>>>\n" and _section[1]]
+    assert [_header for _piggyback,_header,_body in _down] == [b"<<<unifi_controller:sep(124)>>>\n"]
+    assert _down[0][2].startswith(b"error|")
+    assert (b"<<<<up.example>>>>\n",b"<<<unifi_controller:sep(124)>>>\n") in [_section[:2] for _section in _sections]
+
+def test_controllers_share_the_workers(mock_port):
+    ## two controllers with --workers 2 never have more than 2 site requests in flight together
+    sys.path.insert(0,os.path.join(REPO_DIR,"benchmark"))
+    from bench_unifi_agent_model import load_agent
+    _agent = load_agent(AGENT,"unifi_agent_workers")
+    _lock = threading.Lock()
+    _active = [0,0]
+    _get_portconfig = _agent.unifi_controller_api.get_portconfig
+    def _slow_get_portconfig(self,*args,**kwargs):
+        with _lock:
+            _active[0] += 1
+            _active[1] = max(_active)
+        time.sleep(0.1)
+        try:
+            return _get_portconfig(self,*args,**kwargs)
+        finally:
+            with _lock:
+                _active[0] -= 1
+    _agent.unifi_controller_api.get_portconfig = _slow_get_portconfig
+    _apis = [_agent.unifi_controller_api(host="127.0.0.1",username="admin",password="admin",port=mock_port,site=None,
+                                         verify_cert=False,rawapi=False,piggybackattr="name",workers=2) for _ in range(2)]
+    _threads = [threading.Thread(target=_agent.unifi_controller,kwargs={"_API" : _api}) for _api in _apis]
+    for _thread in _threads:
+        _thread.start()
+    for _thread in _threads:
+        _thread.join()
+    assert _active[1] == 2
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8; py-indent-offset: 4 -*-
+#
+##  MIT License
+##
+##  Copyright (c) 2024 Bash Club
+##
+##  Permission is hereby granted, free of charge, to any person obtaining a copy
+##  of this software and associated documentation files (the "Software"), to deal
+##  in the Software without restriction, including without limitation the rights
+##  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+##  copies of the Software, and to permit persons to whom the Software is
+##  furnished to do so, subject to the following conditions:
+##
+##  The above copyright notice and this permission notice shall be included in all
+##  copies or substantial portions of the Software.
+##
+##  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+##  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+##  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+##  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+##  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+##  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+##  SOFTWARE.
+
+
+## The API endpoint services of the plugin, loaded with the stand-ins of benchmark/bench_unifi_plugins.py
+
+import os
+import sys
+
+import pytest
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),"..")
+sys.path.insert(0,os.path.join(REPO_DIR,"benchmark"))
+from bench_unifi_plugins import DEFAULT_PLUGIN, PLUGIN_PACKAGE, load_plugin
+
+def request(endpoint,site="default",seconds="0.2"):
+    return ["request","GET",endpoint,site,"200",seconds,"1000","10"]
+
+@pytest.fixture(scope="module")
+def plugin():
+    load_plugin(DEFAULT_PLUGIN)
+    return sys.modules[f"{PLUGIN_PACKAGE}.unifi_controller"]
+
+@pytest.fixture
+def value_store(plugin):
+    _value_store = plugin.get_value_store()
+    _value_store.clear()
+    return _value_store
+
+def test_login_endpoints_are_not_discovered(plugin):
+    _section = plugin.parse_unifi_agent_perf([request("/api/auth/login",""),request("/",""),request("/rest/portconf"),request("/stat/device")])
+    assert [_service.item for _service in plugin.discovery_unifi_api_endpoint(_section)] == ["/rest/portconf","/stat/device"]
+
+def test_endpoint_not_requested_in_this_run(plugin,value_store):
+    _params = {"max_latency" : (5.0,8.0)}
+    _results = list(plugin.check_unifi_api_endpoint("/rest/portconf",_params,plugin.parse_unifi_agent_perf([request("/stat/device")])))
+    assert [(_result.state,_result.summary) for _result in _results] == [(plugin.State.OK,"Not requested in this run")]
+    list(plugin.check_unifi_api_endpoint("/rest/portconf",_params,plugin.parse_unifi_agent_perf([request("/rest/portconf")])))
+    _results = list(plugin.check_unifi_api_endpoint("/rest/portconf",_params,plugin.parse_unifi_agent_perf([request("/stat/device")])))
+    assert len(_results) == 1 and _results[0].state == plugin.State.OK
+    assert _results[0].summary.startswith("Not requested in this run, last request ")
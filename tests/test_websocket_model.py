@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8; py-indent-offset: 4 -*-
+#
+##  MIT License
+##
+##  Copyright (c) 2024 Bash Club
+##
+##  Permission is hereby granted, free of charge, to any person obtaining a copy
+##  of this software and associated documentation files (the "Software"), to deal
+##  in the Software without restriction, including without limitation the rights
+##  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+##  copies of the Software, and to permit persons to whom the Software is
+##  furnished to do so, subject to the following conditions:
+##
+##  The above copyright notice and this permission notice shall be included in all
+##  copies or substantial portions of the Software.
+##
+##  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+##  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+##  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+##  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+##  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+##  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+##  SOFTWARE.
+
+
+## The websocket device model of the collector (--websocket) against the websocket of
+## benchmark/mock_unifi_controller.py, the tests push the messages through the estate of the mock.
+
+import os
+import shutil
+import sys
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("websocket")
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),"..")
+AGENT = os.path.join(REPO_DIR,"share","check_mk","agents","special","agent_unifi_controller")
+sys.path.insert(0,os.path.join(REPO_DIR,"benchmark"))
+from bench_unifi_agent_model import load_agent
+from mock_unifi_controller import create_argument_parser, create_server
+
+SITE = "default"
+
+def message(kind,*records):
+    return {"meta" : {"rc" : "ok", "message" : kind}, "data" : list(records)}
+
+def wait_for(condition,timeout=10):
+    _end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < _end, "timeout"
+        time.sleep(0.02)
+
+@pytest.fixture(scope="module")
+def agent():
+    _agent = load_agent(AGENT,"unifi_agent_websocket")
+    ## reconnect at once after the mock closed the websocket
+    _agent.UNIFI_WEBSOCKET_RETRY = 0.1
+    return _agent
+
+@pytest.fixture(scope="module")
+def mock():
+    if not shutil.which("openssl"):
+        pytest.skip("the mock controller needs openssl for its certificate")
+    _server = create_server(create_argument_parser().parse_args(["--port","0","--sites","1","--devices-per-site","12","--websocket-updates","0"]))
+    threading.Thread(target=_server.serve_forever,daemon=True).start()
+    yield _server
+    _server.shutdown()
+    _server.server_close()
+
+@pytest.fixture
+def estate(mock):
+    return mock.RequestHandlerClass.ESTATE
+
+@pytest.fixture
+def model(agent,mock):
+    _api = agent.unifi_controller_api(host="127.0.0.1",username="admin",password="admin",port=mock.server_address[1],site=None,
+                                      verify_cert=False,rawapi=False,piggybackattr="name",websocket=True)
+    ## every device request of the model with the requested macs (None for the whole site)
+    _api.device_requests = []
+    _get_devices = _api._get_devices
+    def _counting_get_devices(site,macs=None):
+        _api.device_requests.append(macs)
+        return _get_devices(site,macs=macs)
+    _api._get_devices = _counting_get_devices
+    _model = _api.DEVICE_MODEL
+    yield _model
+    _model.close()
+
+def by_mac(devices):
+    return {_device["mac"] : _device for _device in devices}
+
+def test_snapshot_then_messages(model,estate):
+    _devices = by_mac(model.devices(SITE))
+    assert set(_devices) == set(_device["mac"] for _device in estate.devices(SITE))
+    _mac,_other = sorted(_devices)[:2]
+    assert estate.push(SITE,message("device:update",{"mac" : _mac, "num_sta" : 77})) == 1
+    wait_for(lambda: by_mac(model.devices(SITE))[_mac].get("num_sta") == 77)
+    _sync = dict(_devices[_other],name="renamed",uplink={"uplink_mac" : _mac},port_table=[])
+    estate.push(SITE,message("device:sync",_sync))
+    wait_for(lambda: by_mac(model.devices(SITE))[_other]["name"] == "renamed")
+    assert by_mac(model.devices(SITE))[_other]["port_table"] == []
+    ## the snapshot is the only request
+    assert model._API.device_requests == [None]
+
+def test_update_of_an_unknown_device_requests_it(model,estate):
+    _mac = sorted(by_mac(model.devices(SITE)))[0]
+    with model._lock:
+        del model._sites[SITE][_mac]
+    estate.push(SITE,message("device:update",{"mac" : _mac, "num_sta" : 1}))
+    wait_for(lambda: _mac in model._refresh.get(SITE,()))
+    assert _mac in by_mac(model.devices(SITE))
+    assert model._API.device_requests == [None,[_mac]]
+
+def test_events_request_their_devices(model,estate):
+    _macs = sorted(by_mac(model.devices(SITE)))[:2]
+    estate.push(SITE,message("events",{"key" : "EVT_AP_Restarted", "ap" : _macs[0]},{"key" : "EVT_SW_Lost_Contact", "sw" : _macs[1]},"no record"))
+    wait_for(lambda: model._refresh.get(SITE) == set(_macs))
+    model.devices(SITE)
+    assert model._API.device_requests == [None,_macs]
+    ## the next run has nothing to refresh
+    model.devices(SITE)
+    assert len(model._API.device_requests) == 2
+
+def test_messages_during_the_snapshot_are_applied_afterwards(model,estate):
+    _mac = sorted(_device["mac"] for _device in estate.devices(SITE))[0]
+    _get_devices = model._API._get_devices
+    def _get_devices_with_message(site,macs=None):
+        ## the update arrives while the devices are downloaded
+        estate.push(site,message("device:update",{"mac" : _mac, "satisfaction" : 3}))
+        wait_for(lambda: model._pending.get(site))
+        return _get_devices(site,macs=macs)
+    model._API._get_devices = _get_devices_with_message
+    _snapshot = by_mac(model.devices(SITE))
+    model._API._get_devices = _get_devices
+    assert SITE not in model._pending
+    assert by_mac(model.devices(SITE))[_mac]["satisfaction"] == 3
+    ## the returned snapshot is the response itself
+    assert _snapshot[_mac]["satisfaction"] != 3
+
+def test_reconnect_takes_a_new_snapshot(model,estate):
+    model.devices(SITE)
+    _connected = model._connected[SITE]
+    ## the controller closes the websocket, e.g. on a restart
+    estate.push(SITE,None)
+    wait_for(lambda: SITE not in model._sites)
+    wait_for(_connected.is_set)
+    assert len(by_mac(model.devices(SITE))) == len(estate.devices(SITE))
+    assert model._API.device_requests == [None,None]
+    assert SITE in model._sites